@@ -45,6 +45,7 @@ INSTALLED_APPS = [
     "users",
     "education",
     "rest_framework",
+    "rest_framework_simplejwt.token_blacklist",
     "drf_yasg",
     "django_filters",
     "corsheaders",
@@ -129,6 +130,40 @@ USE_TZ = True
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Выдача материалов уроков: время кеширования в браузере и необязательный
+# префикс internal-location фронт-прокси для X-Accel-Redirect
+MATERIAL_CACHE_MAX_AGE = int(os.getenv("MATERIAL_CACHE_MAX_AGE", 3600))
+MATERIAL_ACCEL_REDIRECT_PREFIX = os.getenv("MATERIAL_ACCEL_REDIRECT_PREFIX", "")
+
+# Загрузка материалов по частям: каталог частей (по умолчанию MEDIA_ROOT/uploads),
+# максимальный размер части и всего файла в байтах
+MATERIAL_UPLOAD_DIR = os.getenv("MATERIAL_UPLOAD_DIR", "")
+MATERIAL_UPLOAD_CHUNK_SIZE = int(os.getenv("MATERIAL_UPLOAD_CHUNK_SIZE", 16 << 20))
+MATERIAL_UPLOAD_MAX_SIZE = int(os.getenv("MATERIAL_UPLOAD_MAX_SIZE", 1 << 30))
+# Через сколько часов без новых частей загрузка удаляется (manage.py purge_uploads)
+MATERIAL_UPLOAD_STALE_HOURS = int(os.getenv("MATERIAL_UPLOAD_STALE_HOURS", 24))
+
+# Извлечение текста материалов для поиска (manage.py extract_materials):
+# dotted path к функции path -> str для PDF и предел длины текста урока
+MATERIAL_PDF_EXTRACTOR = os.getenv("MATERIAL_PDF_EXTRACTOR", "")
+MATERIAL_TEXT_MAX_LENGTH = int(os.getenv("MATERIAL_TEXT_MAX_LENGTH", 1_000_000))
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", 2))
+
+# Миниатюры аватаров: допустимые размеры в пикселях, каталог кеша на диске
+# (по умолчанию MEDIA_ROOT/thumbnails), число процессов пула (0 — рисовать
+# в текущем), подготовка всех миниатюр при загрузке и время кеширования
+AVATAR_THUMBNAIL_SIZES = [
+    int(size)
+    for size in os.getenv("AVATAR_THUMBNAIL_SIZES", "40,80,160,320").split(",")
+]
+AVATAR_THUMBNAIL_DIR = os.getenv("AVATAR_THUMBNAIL_DIR", "")
+AVATAR_THUMBNAIL_QUALITY = int(os.getenv("AVATAR_THUMBNAIL_QUALITY", 80))
+AVATAR_THUMBNAIL_PREGENERATE = (
+    os.getenv("AVATAR_THUMBNAIL_PREGENERATE", "True") == "True"
+)
+AVATAR_THUMBNAIL_MAX_AGE = int(os.getenv("AVATAR_THUMBNAIL_MAX_AGE", 31536000))
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", 2))
+
 STATIC_URL = "static/"
 STATIC_ROOT = BASE_DIR / "static"
 
@@ -141,9 +176,7 @@ AUTH_USER_MODEL = "users.User"
 
 REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
-    "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
-    ),
+    "DEFAULT_AUTHENTICATION_CLASSES": ("users.authentication.CachedJWTAuthentication",),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
@@ -155,8 +188,59 @@ SIMPLE_JWT = {
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
     "AUTH_HEADER_TYPES": ("Bearer",),
+    "TOKEN_OBTAIN_SERIALIZER": "users.serializers.RoleTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "users.serializers.RoleTokenRefreshSerializer",
+    "TOKEN_BLACKLIST_SERIALIZER": "users.serializers.RoleTokenBlacklistSerializer",
 }
 
+# Асинхронные представления горячих эндпоинтов чтения (списка разделов,
+# урока и теста) под ASGI. Выключены по умолчанию: запросы к ORM и кешу в
+# них всё равно идут через sync_to_async, прирост нужно подтвердить замером
+# bench_read_path на своём развёртывании
+ASYNC_READ_VIEWS = os.getenv("ASYNC_READ_VIEWS", "False") == "True"
+
+# Роли пользователя в claims access-токена (проверка прав без запросов к БД)
+JWT_ROLE_CLAIMS = os.getenv("JWT_ROLE_CLAIMS", "False") == "True"
+
+# Кеш строк пользователей для JWT-аутентификации (в памяти каждого процесса)
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 60))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 10000))
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Общий для всех процессов сервера, иначе сброс поколений не доходит до
+    # других воркеров; в продакшене можно указать Redis или Memcached
+    "catalog": {
+        "BACKEND": os.getenv(
+            "CATALOG_CACHE_BACKEND",
+            "django.core.cache.backends.filebased.FileBasedCache",
+        ),
+        "LOCATION": os.getenv(
+            "CATALOG_CACHE_LOCATION", str(BASE_DIR / "cache" / "catalog")
+        ),
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+}
+
+# Кеш ответов каталога (разделы и уроки)
+CATALOG_CACHE_ALIAS = "catalog"
+CATALOG_CACHE_TIMEOUT = int(os.getenv("CATALOG_CACHE_TIMEOUT", 300))
+# Как часто процесс прибавляет свои счётчики попаданий в кеш каталога, секунд
+CATALOG_CACHE_STATS_INTERVAL = int(os.getenv("CATALOG_CACHE_STATS_INTERVAL", 10))
+
+# Размер кеша скомпилированных ключей ответов к тестам
+ANSWER_KEY_CACHE_SIZE = int(os.getenv("ANSWER_KEY_CACHE_SIZE", 256))
+
+# Асинхронная проверка ответов через очередь (manage.py grade_submissions)
+ASYNC_SUBMISSIONS = os.getenv("ASYNC_SUBMISSIONS", "False") == "True"
+SUBMISSION_WORKERS = int(os.getenv("SUBMISSION_WORKERS", 4))
+SUBMISSION_BATCH_SIZE = int(os.getenv("SUBMISSION_BATCH_SIZE", 50))
+
+# Размер пачки при импорте тестов из файлов (manage.py import_tests)
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 500))
+
 if "test" in sys.argv:
     DATABASES = {
         "default": {
@@ -164,6 +248,10 @@ if "test" in sys.argv:
             "NAME": BASE_DIR / "test_db.sqlite3",
         }
     }
+    CACHES["catalog"] = {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "catalog",
+    }
 
 CORS_ALLOWED_ORIGINS = [
     "https://read-only.example.com",
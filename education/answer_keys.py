@@ -0,0 +1,86 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import NamedTuple
+
+from django.conf import settings
+
+from education.models import Question
+
+
+class AnswerKey(NamedTuple):
+    """ Скомпилированный ключ ответов теста """
+    version: int
+    total: int
+    # номер вопроса -> (id вопроса, {номер ответа: id ответа}, номера верных ответов)
+    questions: dict
+
+
+class AnswerKeyCache:
+    """ Ограниченный LRU-кеш ключей ответов в памяти процесса """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, test_id, version):
+        with self._lock:
+            key = self._data.get(test_id)
+            if key is None or key.version != version:
+                return None
+            self._data.move_to_end(test_id)
+            return key
+
+    def set(self, test_id, key):
+        with self._lock:
+            self._data[test_id] = key
+            self._data.move_to_end(test_id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, test_id):
+        with self._lock:
+            self._data.pop(test_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+answer_key_cache = AnswerKeyCache(getattr(settings, "ANSWER_KEY_CACHE_SIZE", 256))
+
+
+def compile_answer_key(test):
+    """ Сборка ключа ответов одним запросом """
+    questions = {}
+    rows = Question.objects.filter(test=test).values_list(
+        "id", "number", "answers__id", "answers__number", "answers__is_correct"
+    )
+    for question_id, q_num, answer_id, a_num, is_correct in rows:
+        _, answers, correct = questions.setdefault(q_num, (question_id, {}, set()))
+        if answer_id is None:
+            continue
+        answers[a_num] = answer_id
+        if is_correct:
+            correct.add(a_num)
+
+    return AnswerKey(
+        version=test.version,
+        total=len(questions),
+        questions={
+            q_num: (question_id, answers, frozenset(correct))
+            for q_num, (question_id, answers, correct) in questions.items()
+        },
+    )
+
+
+def get_answer_key(test):
+    """ Ключ ответов теста из кеша или из базы данных """
+    key = answer_key_cache.get(test.id, test.version)
+    if key is None:
+        key = compile_answer_key(test)
+        answer_key_cache.set(test.id, key)
+    return key
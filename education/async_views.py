@@ -0,0 +1,206 @@
+from inspect import isawaitable
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from rest_framework import exceptions
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import (
+    AllowAny,
+    IsAdminUser,
+    IsAuthenticated,
+    IsAuthenticatedOrReadOnly,
+)
+from rest_framework.response import Response
+
+from education.conditional import AsyncConditionalRetrieveMixin
+from education.delivery import aget_test_payload
+from education.response_cache import AsyncCachedResponseMixin
+from education.views import (
+    LessonRetrieveAPIView,
+    SectionListApiView,
+    TestRetrieveApiView,
+)
+
+# Права, которые не обращаются к базе данных и проверяются прямо в event loop
+NON_BLOCKING_PERMISSIONS = (
+    AllowAny,
+    IsAdminUser,
+    IsAuthenticated,
+    IsAuthenticatedOrReadOnly,
+)
+
+
+async def has_permission(permission, request, view):
+    check = getattr(permission, "ahas_permission", None)
+    if check is not None:
+        return await check(request, view)
+    if isinstance(permission, NON_BLOCKING_PERMISSIONS):
+        return permission.has_permission(request, view)
+    return await sync_to_async(permission.has_permission)(request, view)
+
+
+async def has_object_permission(permission, request, view, obj):
+    check = getattr(permission, "ahas_object_permission", None)
+    if check is not None:
+        return await check(request, view, obj)
+    if isinstance(permission, NON_BLOCKING_PERMISSIONS):
+        return permission.has_object_permission(request, view, obj)
+    return await sync_to_async(permission.has_object_permission)(request, view, obj)
+
+
+class AsyncAPIViewMixin:
+    """ Асинхронная обработка запроса DRF под ASGI
+
+    Аутентификаторы и права с методами aauthenticate/ahas_permission
+    вызываются в event loop, остальные — через sync_to_async. Асинхронные
+    методы ORM и кеша Django сами выполняются через sync_to_async, так что
+    каждый запрос к базе или кешу всё равно переходит в поток.
+    """
+
+    view_is_async = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.ainitial(request, *args, **kwargs)
+            handler = self.http_method_not_allowed
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            response = handler(request, *args, **kwargs)
+            if isawaitable(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def ainitial(self, request, *args, **kwargs):
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+        neg = self.perform_content_negotiation(request)
+        request.accepted_renderer, request.accepted_media_type = neg
+        version, scheme = self.determine_version(request, *args, **kwargs)
+        request.version, request.versioning_scheme = version, scheme
+
+        await self.aperform_authentication(request)
+        await self.acheck_permissions(request)
+        self.check_throttles(request)
+
+    async def aperform_authentication(self, request):
+        for authenticator in request.authenticators:
+            authenticate = getattr(authenticator, "aauthenticate", None)
+            if authenticate is None:
+                authenticate = sync_to_async(authenticator.authenticate)
+            try:
+                user_auth = await authenticate(request)
+            except exceptions.APIException:
+                request._not_authenticated()
+                raise
+
+            if user_auth is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth
+                return
+        request._not_authenticated()
+
+    async def acheck_permissions(self, request):
+        for permission in self.get_permissions():
+            if not await has_permission(permission, request, self):
+                self.permission_denied(
+                    request,
+                    message=getattr(permission, "message", None),
+                    code=getattr(permission, "code", None),
+                )
+
+    async def acheck_object_permissions(self, request, obj):
+        for permission in self.get_permissions():
+            if not await has_object_permission(permission, request, self, obj):
+                self.permission_denied(
+                    request,
+                    message=getattr(permission, "message", None),
+                    code=getattr(permission, "code", None),
+                )
+
+
+class AsyncListModelMixin:
+    """ Список объектов через async ORM """
+
+    async def get(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.paginator is None:
+            serializer = self.get_serializer([obj async for obj in queryset], many=True)
+            return Response(serializer.data)
+
+        page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class AsyncRetrieveModelMixin:
+    """ Получение объекта через async ORM """
+
+    async def get(self, request, *args, **kwargs):
+        return await self.aretrieve(request, *args, **kwargs)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        return Response(self.get_serializer(instance).data)
+
+    async def aget_object(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404
+        await self.acheck_object_permissions(self.request, obj)
+        return obj
+
+
+class AsyncSectionListApiView(
+    AsyncCachedResponseMixin,
+    AsyncListModelMixin,
+    AsyncAPIViewMixin,
+    SectionListApiView,
+):
+    """ Список разделов для ASGI """
+
+
+class AsyncLessonRetrieveAPIView(
+    AsyncConditionalRetrieveMixin,
+    AsyncRetrieveModelMixin,
+    AsyncAPIViewMixin,
+    LessonRetrieveAPIView,
+):
+    """ Урок для ASGI """
+
+
+class AsyncTestRetrieveApiView(
+    AsyncConditionalRetrieveMixin,
+    AsyncRetrieveModelMixin,
+    AsyncAPIViewMixin,
+    TestRetrieveApiView,
+):
+    """ Тест для прохождения для ASGI """
+
+    async def aretrieve(self, request, *args, **kwargs):
+        if "fields" in request.query_params or "expand" in request.query_params:
+            return await super().aretrieve(request, *args, **kwargs)
+
+        payload = await aget_test_payload(kwargs["pk"])
+        if payload is None:
+            raise NotFound()
+        return Response(payload)
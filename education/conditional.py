@@ -0,0 +1,75 @@
+from calendar import timegm
+
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+
+class ConditionalRetrieveMixin:
+    """ETag и Last-Modified по версии объекта, 304 без сериализации"""
+
+    version_state = None
+
+    def get(self, request, *args, **kwargs):
+        state = self.version_state = self.get_version_state(
+            kwargs[self.lookup_url_kwarg or self.lookup_field]
+        )
+        if state is None:
+            return super().get(request, *args, **kwargs)
+
+        etag, last_modified = state
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return set_version_headers(response, state)
+
+    def get_cache_version(self):
+        """Версия в ключе кеша ответа, чтобы тело не расходилось с ETag"""
+        return self.version_state and self.version_state[0]
+
+    def version_query(self, lookup_value):
+        return self.queryset.model.objects.filter(
+            **{self.lookup_field: lookup_value}
+        ).values_list("version", "updated_at")
+
+    def get_version_state(self, lookup_value):
+        """ETag и время изменения объекта одним запросом по индексу"""
+        return version_state(self.version_query(lookup_value).first())
+
+
+class AsyncConditionalRetrieveMixin(ConditionalRetrieveMixin):
+    """Асинхронный вариант ConditionalRetrieveMixin для ASGI-представлений"""
+
+    async def get(self, request, *args, **kwargs):
+        state = self.version_state = await self.aget_version_state(
+            kwargs[self.lookup_url_kwarg or self.lookup_field]
+        )
+        if state is None:
+            return await super().get(request, *args, **kwargs)
+
+        etag, last_modified = state
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = await super().get(request, *args, **kwargs)
+        return set_version_headers(response, state)
+
+    async def aget_version_state(self, lookup_value):
+        return version_state(await self.version_query(lookup_value).afirst())
+
+
+def version_state(row):
+    if row is None:
+        return None
+    version, updated_at = row
+    return quote_etag(str(version)), timegm(updated_at.utctimetuple())
+
+
+def set_version_headers(response, state):
+    etag, last_modified = state
+    if response.status_code in (200, 304):
+        response.headers.setdefault("ETag", etag)
+        response.headers.setdefault("Last-Modified", http_date(last_modified))
+    return response
@@ -0,0 +1,84 @@
+from django.db.models import Count, F
+
+from education.fieldsets import expanded_paths
+from education.models import Section, SectionTree
+from education.serializers import SectionSerializer
+
+TREE_EXPAND = {"lessons", "lessons.tests"}
+
+
+def tree_paths():
+    return expanded_paths(SectionSerializer, None, TREE_EXPAND)
+
+
+def is_course_tree(expand):
+    """ Совпадает ли запрошенное раскрытие с полным деревом курса """
+    return (
+        expand is not None
+        and expanded_paths(SectionSerializer, None, expand) == tree_paths()
+    )
+
+
+def rebuild_section_trees(section_ids=None, batch_size=100, only_stale=False):
+    """ Пересборка деревьев курса пачками, возвращает {id раздела: дерево} """
+    sections = Section.objects.all()
+    if section_ids is not None:
+        sections = sections.filter(pk__in=section_ids)
+    if only_stale:
+        sections = sections.exclude(tree__version=F("version"))
+    sections = (
+        sections.annotate(lessons_count=Count("lessons"))
+        .prefetch_related(*tree_paths())
+        .order_by("pk")
+    )
+
+    documents = {}
+    batch = []
+    for section in sections.iterator(chunk_size=batch_size):
+        document = SectionSerializer(section, context={"expand": TREE_EXPAND}).data
+        documents[section.pk] = document
+        batch.append(
+            SectionTree(section=section, version=section.version, document=document)
+        )
+        if len(batch) >= batch_size:
+            save_trees(batch)
+            batch = []
+    save_trees(batch)
+    return documents
+
+
+def save_trees(trees):
+    SectionTree.objects.bulk_create(
+        trees,
+        update_conflicts=True,
+        unique_fields=["section"],
+        update_fields=["version", "document", "built_at"],
+    )
+
+
+def absolutize_tree(document, request):
+    """ Абсолютные URL материалов уроков дерева для текущего запроса
+
+    Дерево собирается без запроса, поэтому в нём хранятся URL от корня сайта.
+    """
+    lessons = [
+        (
+            {**lesson, "material": request.build_absolute_uri(lesson["material"])}
+            if lesson.get("material")
+            else lesson
+        )
+        for lesson in document.get("lessons", [])
+    ]
+    return {**document, "lessons": lessons}
+
+
+def get_section_tree(section_id):
+    """ Актуальное дерево курса раздела, при устаревании собирается заново """
+    document = (
+        SectionTree.objects.filter(section_id=section_id, version=F("section__version"))
+        .values_list("document", flat=True)
+        .first()
+    )
+    if document is None:
+        document = rebuild_section_trees([section_id]).get(section_id)
+    return document
@@ -0,0 +1,52 @@
+from education.models import Question, Test
+
+TEST_FIELDS = ("id", "title", "description", "lesson", "owner")
+
+
+def group_questions(rows):
+    """ Группировка строк вопрос/ответ во вложенную структуру за один проход """
+    questions = []
+    current = None
+    for number, question, answer_number, answer in rows:
+        if current is None or current["number"] != number:
+            current = {"number": number, "question": question, "answers": []}
+            questions.append(current)
+        if answer_number is not None:
+            current["answers"].append({"number": answer_number, "answer": answer})
+    return questions
+
+
+def question_rows(test_id):
+    return (
+        Question.objects.filter(test_id=test_id)
+        .order_by("number", "answers__number")
+        .values_list("number", "question", "answers__number", "answers__answer")
+    )
+
+
+def build_test_payload(test, rows):
+    """ Тест в формате TestGetSerializer """
+    return {
+        "id": test["id"],
+        "title": test["title"],
+        "description": test["description"],
+        "lesson": test["lesson"],
+        "questions": group_questions(rows),
+        "owner": test["owner"],
+    }
+
+
+def get_test_payload(pk):
+    """ Тест для прохождения без DRF-сериализаторов, None если теста нет """
+    test = Test.objects.filter(pk=pk).values(*TEST_FIELDS).first()
+    if test is None:
+        return None
+    return build_test_payload(test, question_rows(pk))
+
+
+async def aget_test_payload(pk):
+    """ Асинхронный вариант get_test_payload для ASGI-представлений """
+    test = await Test.objects.filter(pk=pk).values(*TEST_FIELDS).afirst()
+    if test is None:
+        return None
+    return build_test_payload(test, [row async for row in question_rows(pk)])
@@ -0,0 +1,135 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import content_disposition_header, http_date
+
+from education.storage import name_digest
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    """ Запрошенный диапазон байт вне файла """
+
+
+class FileRange:
+    """ Ограниченное окно файла для ответа на запрос с конечным диапазоном """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """ Границы одного диапазона из заголовка Range или None для всего файла """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if match is None:
+        return None
+
+    start, end = match.groups()
+    if not start:
+        if not end:
+            return None
+        length = min(int(end), size)
+        if length == 0:
+            raise RangeNotSatisfiable
+        return size - length, size - 1
+
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+def file_state(field_file):
+    """ ETag и время изменения файла: SHA-256 из имени или размер и mtime """
+    stat = os.stat(field_file.path)
+    etag = quote_etag(
+        name_digest(field_file.name) or f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+    )
+    return etag, int(stat.st_mtime), stat.st_size
+
+
+def content_type(name):
+    return mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+
+def set_file_headers(response, name, etag, last_modified):
+    response.headers["ETag"] = etag
+    response.headers["Last-Modified"] = http_date(last_modified)
+    response.headers["Accept-Ranges"] = "bytes"
+    response.headers["Cache-Control"] = (
+        f"private, max-age={settings.MATERIAL_CACHE_MAX_AGE}"
+    )
+    response.headers["Content-Disposition"] = content_disposition_header(
+        False, os.path.basename(name)
+    )
+    return response
+
+
+def accel_redirect_response(field_file):
+    """ Передача файла фронт-прокси через X-Accel-Redirect """
+    response = HttpResponse()
+    response.headers["Content-Type"] = content_type(field_file.name)
+    response.headers["X-Accel-Redirect"] = (
+        settings.MATERIAL_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + field_file.name
+    )
+    return response
+
+
+def file_download_response(request, field_file):
+    """ Ответ с файлом с поддержкой Range, ETag и условных запросов
+
+    Весь файл и открытый диапазон (bytes=N-) отдаются FileResponse
+    с позиции N, что позволяет WSGI-серверу использовать os.sendfile.
+    """
+    etag, last_modified, size = file_state(field_file)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return set_file_headers(response, field_file.name, etag, last_modified)
+
+    if settings.MATERIAL_ACCEL_REDIRECT_PREFIX:
+        response = accel_redirect_response(field_file)
+        return set_file_headers(response, field_file.name, etag, last_modified)
+
+    if_range = request.headers.get("If-Range")
+    try:
+        byte_range = None
+        if if_range is None or if_range == etag:
+            byte_range = parse_range(request.headers.get("Range"), size)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response.headers["Content-Range"] = f"bytes */{size}"
+        return response
+
+    file = open(field_file.path, "rb")
+    if byte_range is None:
+        response = FileResponse(file)
+    else:
+        start, end = byte_range
+        if end == size - 1:
+            file.seek(start)
+        else:
+            file = FileRange(file, start, end - start + 1)
+        response = FileResponse(file, status=206)
+        response.headers["Content-Length"] = end - start + 1
+        response.headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    response.headers["Content-Type"] = content_type(field_file.name)
+    return set_file_headers(response, field_file.name, etag, last_modified)
@@ -0,0 +1,213 @@
+import codecs
+import os
+import re
+import unicodedata
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils.module_loading import import_string
+
+from education.models import Lesson, MaterialText
+from education.search import index_object
+from education.storage import content_storage, file_digest, name_digest
+
+WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+SHEET_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+READ_BLOCK_SIZE = 64 * 1024
+
+
+class TextCollector:
+    """ Накопление текста с ограничением длины """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.parts = []
+        self.length = 0
+
+    @property
+    def full(self):
+        return self.length >= self.limit
+
+    def add(self, text):
+        if text and not self.full:
+            text = text[: self.limit - self.length]
+            self.parts.append(text)
+            self.length += len(text)
+
+    def text(self):
+        return "".join(self.parts)
+
+
+def normalize_text(text):
+    """ Нормализация Unicode и пробелов извлечённого текста """
+    text = unicodedata.normalize("NFKC", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def extract_txt(path, collector):
+    """ Потоковое чтение текстового файла в UTF-8 """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(READ_BLOCK_SIZE), b""):
+            collector.add(decoder.decode(block))
+            if collector.full:
+                return
+    collector.add(decoder.decode(b"", final=True))
+
+
+def iter_xml(archive, member, tags):
+    """ Элементы с нужными тегами из XML внутри zip-архива без загрузки в память """
+    with archive.open(member) as xml:
+        for _, element in iterparse(xml):
+            if element.tag in tags:
+                yield element
+                element.clear()
+
+
+def extract_docx(path, collector):
+    """ Текст абзацев документа Word из word/document.xml """
+    with zipfile.ZipFile(path) as archive:
+        for element in iter_xml(
+            archive, "word/document.xml", {WORD_NS + "t", WORD_NS + "p"}
+        ):
+            collector.add(element.text if element.tag == WORD_NS + "t" else "\n")
+            if collector.full:
+                return
+
+
+def extract_xlsx(path, collector):
+    """ Значения ячеек всех листов книги Excel """
+    with zipfile.ZipFile(path) as archive:
+        names = set(archive.namelist())
+        shared = []
+        if "xl/sharedStrings.xml" in names:
+            for item in iter_xml(archive, "xl/sharedStrings.xml", {SHEET_NS + "si"}):
+                shared.append("".join(item.itertext()))
+
+        sheets = sorted(
+            name
+            for name in names
+            if name.startswith("xl/worksheets/") and name.endswith(".xml")
+        )
+        for sheet in sheets:
+            for cell in iter_xml(archive, sheet, {SHEET_NS + "c"}):
+                if cell.get("t") == "inlineStr":
+                    value = "".join(cell.itertext())
+                else:
+                    value = cell.findtext(SHEET_NS + "v")
+                    if value is not None and cell.get("t") == "s":
+                        value = shared[int(value)]
+                collector.add(f"{value} " if value else "")
+                if collector.full:
+                    return
+
+
+def extract_pdf(path, collector):
+    """ Текст PDF через подключаемый MATERIAL_PDF_EXTRACTOR(path) -> str """
+    if settings.MATERIAL_PDF_EXTRACTOR:
+        collector.add(import_string(settings.MATERIAL_PDF_EXTRACTOR)(path))
+
+
+EXTRACTORS = {
+    ".txt": extract_txt,
+    ".docx": extract_docx,
+    ".xlsx": extract_xlsx,
+    ".pdf": extract_pdf,
+}
+
+
+def extract_file(path):
+    """ Нормализованный текст файла и ошибка извлечения (для пула процессов) """
+    extractor = EXTRACTORS.get(os.path.splitext(path)[1].lower())
+    if extractor is None:
+        return "", ""
+    collector = TextCollector(settings.MATERIAL_TEXT_MAX_LENGTH)
+    try:
+        extractor(path, collector)
+    except Exception as e:
+        return "", f"{type(e).__name__}: {e}"
+    return normalize_text(collector.text()), ""
+
+
+def pending_materials(batch_size):
+    """ Уроки, материал которых ещё не обработан после последнего изменения """
+    return list(
+        Lesson.objects.exclude(material="")
+        .exclude(material__isnull=True)
+        .annotate(extracted=F("material_text__material"))
+        .filter(Q(extracted__isnull=True) | ~Q(extracted=F("material")))
+        .order_by("id")
+        .values_list("id", "material")[:batch_size]
+    )
+
+
+def source_digest(name):
+    """ SHA-256 материала из имени файла или по его содержимому """
+    digest = name_digest(name)
+    if digest is None:
+        try:
+            digest = file_digest(content_storage.path(name))
+        except OSError:
+            digest = ""
+    return digest
+
+
+def extract_batch(rows, pool=None):
+    """ Извлечение текста пачки материалов с пропуском неизменившихся файлов """
+    digests = {lesson_id: source_digest(name) for lesson_id, name in rows}
+    stored = dict(
+        MaterialText.objects.filter(lesson_id__in=digests).values_list(
+            "lesson_id", "digest"
+        )
+    )
+
+    changed = []
+    for lesson_id, name in rows:
+        if digests[lesson_id] and stored.get(lesson_id) == digests[lesson_id]:
+            MaterialText.objects.filter(lesson_id=lesson_id).update(material=name)
+        else:
+            changed.append((lesson_id, name))
+
+    paths = [content_storage.path(name) for _, name in changed]
+    results = pool.map(extract_file, paths) if pool else map(extract_file, paths)
+    for (lesson_id, name), (text, error) in zip(changed, results):
+        MaterialText.objects.update_or_create(
+            lesson_id=lesson_id,
+            defaults={
+                "material": name,
+                "digest": digests[lesson_id],
+                "text": text,
+                "error": error,
+            },
+        )
+
+    for lesson in Lesson.objects.filter(id__in=[lesson_id for lesson_id, _ in changed]):
+        index_object(lesson)
+    return len(changed)
+
+
+def prune_texts():
+    """ Удаление текста уроков, у которых больше нет материала """
+    orphaned = MaterialText.objects.filter(
+        Q(lesson__material="") | Q(lesson__material=None)
+    )
+    lessons = list(orphaned.values_list("lesson_id", flat=True))
+    if lessons:
+        MaterialText.objects.filter(lesson_id__in=lessons).delete()
+        for lesson in Lesson.objects.filter(id__in=lessons):
+            index_object(lesson)
+    return len(lessons)
+
+
+def run_extraction(pool=None, batch_size=50):
+    """ Обработка всех ожидающих материалов, возвращает число извлечений """
+    close_old_connections()
+    extracted = 0
+    prune_texts()
+    while rows := pending_materials(batch_size):
+        extracted += extract_batch(rows, pool)
+    return extracted
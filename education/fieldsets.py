@@ -0,0 +1,110 @@
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.serializers import ListSerializer
+
+
+def parse_paths(value):
+    """ Разбор списка путей вида "lessons,lessons.tests" """
+    if value is None:
+        return None
+    return {path.strip() for path in value.split(",") if path.strip()}
+
+
+def get_fieldsets(request):
+    """ Параметры ?fields= и ?expand= из запроса """
+    if request is None or request.method not in SAFE_METHODS:
+        return None, None
+    return (
+        parse_paths(request.query_params.get("fields")),
+        parse_paths(request.query_params.get("expand")),
+    )
+
+
+def nested_paths(paths, name):
+    """ Пути вложенного объекта; None, если для него ничего не указано """
+    if paths is None:
+        return None
+    prefix = f"{name}."
+    nested = {path.removeprefix(prefix) for path in paths if path.startswith(prefix)}
+    return nested or None
+
+
+def is_included(name, default, fields, expand):
+    """ Нужно ли выводить вложенное поле """
+    if fields is not None and name not in {path.split(".")[0] for path in fields}:
+        return False
+    if expand is None:
+        return default
+    return name in {path.split(".")[0] for path in expand}
+
+
+def expanded_paths(serializer_class, fields, expand, prefix=""):
+    """ Пути для prefetch_related по раскрытым вложенным полям """
+    paths = []
+    expandable = getattr(serializer_class.Meta, "expandable_fields", {})
+    for name, default in expandable.items():
+        if not is_included(name, default, fields, expand):
+            continue
+        field = serializer_class._declared_fields[name]
+        child = getattr(field, "child", field)
+        path = prefix + (field.source or name)
+        paths.append(path)
+        paths += expanded_paths(
+            type(child),
+            nested_paths(fields, name),
+            nested_paths(expand, name),
+            f"{path}__",
+        )
+    return paths
+
+
+class ExpandableFieldsMixin:
+    """ Выборочные поля (?fields=) и раскрытие вложенных объектов (?expand=) """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested, expand = self.get_fieldsets()
+        expandable = getattr(self.Meta, "expandable_fields", {})
+        for name in list(fields):
+            if name in expandable:
+                included = is_included(name, expandable[name], requested, expand)
+            else:
+                included = requested is None or name in {
+                    path.split(".")[0] for path in requested
+                }
+            if not included:
+                del fields[name]
+        return fields
+
+    def get_fieldsets(self):
+        """ Параметры запроса, относящиеся к этому уровню вложенности """
+        if "fields" in self.context or "expand" in self.context:
+            requested = self.context.get("fields")
+            expand = self.context.get("expand")
+        else:
+            requested, expand = get_fieldsets(self.context.get("request"))
+        for name in reversed(self.get_field_path()):
+            requested = nested_paths(requested, name)
+            expand = nested_paths(expand, name)
+        return requested, expand
+
+    def get_field_path(self):
+        path = []
+        node = self
+        while True:
+            if isinstance(node.parent, ListSerializer):
+                node = node.parent
+            if node.parent is None:
+                return path
+            path.append(node.field_name)
+            node = node.parent
+
+
+class ExpandableQuerysetMixin:
+    """ Предзагрузка только запрошенных вложенных объектов """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields, expand = get_fieldsets(self.request)
+        return queryset.prefetch_related(
+            *expanded_paths(self.get_serializer_class(), fields, expand)
+        )
@@ -0,0 +1,246 @@
+import csv
+import json
+from collections import deque
+from itertools import groupby
+
+import yaml
+from django.db import transaction
+from yaml.composer import Composer
+from yaml.constructor import SafeConstructor
+from yaml.events import (
+    CollectionEndEvent,
+    CollectionStartEvent,
+    DocumentEndEvent,
+    DocumentStartEvent,
+    SequenceEndEvent,
+    SequenceStartEvent,
+    StreamEndEvent,
+    StreamStartEvent,
+)
+from yaml.resolver import Resolver
+
+from education.models import Test
+from education.serializers import ImportTestSerializer
+from education.services import bulk_create_questions
+
+try:
+    from yaml import CSafeLoader as YAMLLoader
+except ImportError:
+    from yaml import SafeLoader as YAMLLoader
+
+FORMATS = {
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".yaml": "yaml",
+    ".yml": "yaml",
+    ".csv": "csv",
+}
+
+CSV_TEST_FIELDS = ("title", "description", "lesson")
+
+# Колонка CSV с ключом теста: подряд идущие строки с одним ключом — один тест
+CSV_KEY_FIELD = "test"
+
+
+class ImportFormatError(Exception):
+    """ Неизвестный формат файла импорта """
+
+
+def detect_format(filename):
+    for extension, file_format in FORMATS.items():
+        if filename.lower().endswith(extension):
+            return file_format
+    raise ImportFormatError(f"Не удалось определить формат файла '{filename}'.")
+
+
+def read_jsonl(stream):
+    """ Тесты из JSON Lines: по одному объекту на строку """
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line), None
+        except ValueError as error:
+            yield line_number, None, f"Некорректный JSON: {error}"
+
+
+class EventLoader(Composer, SafeConstructor, Resolver):
+    """ Сборка одного значения YAML из уже разобранных событий """
+
+    def __init__(self, events):
+        self.events = deque(events)
+        Composer.__init__(self)
+        SafeConstructor.__init__(self)
+        Resolver.__init__(self)
+
+    def check_event(self, *choices):
+        return bool(self.events) and (
+            not choices or isinstance(self.events[0], choices)
+        )
+
+    def peek_event(self):
+        return self.events[0]
+
+    def get_event(self):
+        return self.events.popleft()
+
+
+def value_events(first, events):
+    """ События одного значения YAML, начиная с first """
+    collected = [first]
+    depth = int(isinstance(first, CollectionStartEvent))
+    while depth:
+        event = next(events)
+        collected.append(event)
+        if isinstance(event, CollectionStartEvent):
+            depth += 1
+        elif isinstance(event, CollectionEndEvent):
+            depth -= 1
+    return collected
+
+
+def construct(events):
+    loader = EventLoader(
+        [StreamStartEvent(), DocumentStartEvent(), *events]
+        + [DocumentEndEvent(), StreamEndEvent()]
+    )
+    return loader.get_single_data()
+
+
+def read_values(events):
+    """ Тесты документов YAML: сам документ или элементы списка верхнего уровня
+
+    Каждый тест собирается из своих событий, поэтому в памяти держится
+    только один тест, даже если весь файл — один список.
+    """
+    for event in events:
+        if not isinstance(event, DocumentStartEvent):
+            continue
+        first = next(events)
+        if not isinstance(first, SequenceStartEvent):
+            yield value_events(first, events)
+            continue
+        for item in events:
+            if isinstance(item, SequenceEndEvent):
+                break
+            yield value_events(item, events)
+
+
+def read_yaml(stream):
+    """ Тесты из YAML: по одному тесту или списку тестов на документ """
+    values = read_values(yaml.parse(stream, Loader=YAMLLoader))
+    position = 0
+    while True:
+        try:
+            events = next(values)
+        except StopIteration:
+            return
+        except yaml.YAMLError as error:
+            yield position + 1, None, f"Некорректный YAML: {error}"
+            return
+        position += 1
+        try:
+            yield position, construct(events), None
+        except yaml.YAMLError as error:
+            yield position, None, f"Некорректный YAML: {error}"
+
+
+def csv_record(rows):
+    """ Сборка теста из строк CSV: одна строка на ответ """
+    first = rows[0]
+    record = {field: first[field] for field in CSV_TEST_FIELDS if first.get(field)}
+    questions = {}
+    for row in rows:
+        if not row.get("question_number"):
+            continue
+        question = questions.setdefault(
+            row["question_number"],
+            {
+                "number": row["question_number"],
+                "question": row.get("question"),
+                "answers": [],
+            },
+        )
+        if row.get("answer_number"):
+            question["answers"].append(
+                {
+                    "number": row["answer_number"],
+                    "answer": row.get("answer"),
+                    "is_correct": row.get("is_correct") or False,
+                }
+            )
+    record["questions"] = list(questions.values())
+    return record
+
+
+def read_csv(stream):
+    """ Тесты из CSV: подряд идущие строки с одинаковым ключом в колонке test """
+    reader = csv.DictReader(stream)
+    if reader.fieldnames is not None and CSV_KEY_FIELD not in reader.fieldnames:
+        yield 1, None, f"В CSV нет колонки {CSV_KEY_FIELD} с ключом теста."
+        return
+    rows = ((reader.line_num, row) for row in reader)
+    for _, group in groupby(rows, key=lambda item: item[1].get(CSV_KEY_FIELD)):
+        group = list(group)
+        yield group[0][0], csv_record([row for _, row in group]), None
+
+
+READERS = {"jsonl": read_jsonl, "yaml": read_yaml, "csv": read_csv}
+
+
+def save_batch(batch, owner):
+    """ Сохранение пачки проверенных тестов в одной транзакции
+
+    Если пачка не сохранилась, записи сохраняются по одной, и ошибка
+    попадает в отчёт только той записи, на которой она возникла.
+    """
+    from education.signals import tests_created
+
+    tests = []
+    questions = []
+    for _, data in batch:
+        data = dict(data)
+        questions.append(data.pop("questions", []))
+        tests.append(Test(owner=owner, **data))
+
+    try:
+        with transaction.atomic():
+            Test.objects.bulk_create(tests)
+            bulk_create_questions(zip(tests, questions))
+            tests_created(tests)
+    except Exception as error:
+        if len(batch) > 1:
+            for item in batch:
+                yield from save_batch([item], owner)
+            return
+        errors = f"{type(error).__name__}: {error}"
+        yield {"record": batch[0][0], "status": "error", "errors": errors}
+        return
+
+    for (position, _), test in zip(batch, tests):
+        yield {"record": position, "status": "created", "id": test.id}
+
+
+def import_tests(stream, file_format, owner=None, batch_size=500):
+    """ Потоковый импорт тестов с отчётом по каждой записи
+
+    Записи читаются и проверяются по одной, в памяти держится только
+    текущая пачка. Генератор отдаёт отчёт по каждой записи.
+    """
+    batch = []
+    for position, data, error in READERS[file_format](stream):
+        if error is None:
+            serializer = ImportTestSerializer(data=data)
+            if serializer.is_valid():
+                batch.append((position, serializer.validated_data))
+            else:
+                error = serializer.errors
+        if error is not None:
+            yield {"record": position, "status": "error", "errors": error}
+
+        if len(batch) >= batch_size:
+            yield from save_batch(batch, owner)
+            batch = []
+
+    if batch:
+        yield from save_batch(batch, owner)
@@ -0,0 +1,124 @@
+import asyncio
+import math
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from education.models import Lesson, Section, Test
+from users.models import User
+from users.tokens import RoleRefreshToken
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[max(math.ceil(len(ordered) * percent / 100) - 1, 0)]
+
+
+async def fetch(host, port, request):
+    """ Один GET-запрос по отдельному соединению, возвращает код ответа """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(request)
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return int(status_line.split()[1])
+
+
+async def load(url, token, total, concurrency):
+    """ Запросы/с, p50, p99 (мс) и число ошибок при concurrency параллельных """
+    parts = urlsplit(url)
+    target = parts.path + (f"?{parts.query}" if parts.query else "")
+    request = (
+        f"GET {target} HTTP/1.1\r\n"
+        f"Host: {parts.netloc}\r\n"
+        f"Authorization: Bearer {token}\r\n"
+        "Connection: close\r\n\r\n"
+    ).encode()
+
+    latencies = []
+    errors = 0
+    remaining = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                status = await fetch(parts.hostname, parts.port or 80, request)
+            except (OSError, IndexError, ValueError):
+                status = None
+            latencies.append((time.perf_counter() - start) * 1000)
+            if status != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return (
+        total / elapsed,
+        percentile(latencies, 50),
+        percentile(latencies, 99),
+        errors,
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнение запросов/с и p99 горячих эндпоинтов чтения на запущенных "
+        "WSGI- и ASGI-серверах, например: gunicorn config.wsgi -b :8000 и "
+        "uvicorn config.asgi:application --port 8001 с той же базой данных"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--wsgi", help="Базовый URL WSGI-сервера")
+        parser.add_argument("--asgi", help="Базовый URL ASGI-сервера")
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=100)
+        parser.add_argument("--warmup", type=int, default=50)
+        parser.add_argument("--email", help="Пользователь для JWT-токена")
+
+    def handle(self, *args, **options):
+        servers = [
+            (name, options[name].rstrip("/"))
+            for name in ("wsgi", "asgi")
+            if options[name]
+        ]
+        if not servers:
+            raise CommandError("Укажите --wsgi и/или --asgi.")
+
+        users = User.objects.filter(is_active=True)
+        if options["email"]:
+            users = users.filter(email=options["email"])
+        user = users.order_by("id").first()
+        lesson = Lesson.objects.order_by("id").first()
+        test = Test.objects.order_by("id").first()
+        if user is None or lesson is None or test is None:
+            raise CommandError("Нужны активный пользователь, урок и тест в базе.")
+        if not Section.objects.exists():
+            raise CommandError("Нужен хотя бы один раздел в базе.")
+        token = str(RoleRefreshToken.for_user(user).access_token)
+
+        endpoints = ["/sections/", f"/lesson/{lesson.id}/", f"/test/{test.id}/"]
+        self.stdout.write(
+            f"{'endpoint':<16} {'server':<6} {'req/s':>9} "
+            f"{'p50 ms':>8} {'p99 ms':>8} {'errors':>7}"
+        )
+        for endpoint in endpoints:
+            for name, base in servers:
+                url = base + endpoint
+                if options["warmup"]:
+                    asyncio.run(
+                        load(url, token, options["warmup"], options["concurrency"])
+                    )
+                rps, p50, p99, errors = asyncio.run(
+                    load(url, token, options["requests"], options["concurrency"])
+                )
+                self.stdout.write(
+                    f"{endpoint:<16} {name:<6} {rps:>9.1f} "
+                    f"{p50:>8.2f} {p99:>8.2f} {errors:>7}"
+                )
@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from education.delivery import get_test_payload
+from education.models import Answer, Question, Test
+from education.serializers import TestGetSerializer
+
+ANSWERS_PER_QUESTION = 4
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Сравнение TestGetSerializer и быстрого пути выдачи теста"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                for size in options["sizes"]:
+                    self.bench(size, options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def bench(self, size, repeat):
+        test = Test.objects.create(title=f"Benchmark {size}")
+        questions = Question.objects.bulk_create(
+            Question(test=test, number=number, question=f"Вопрос {number}")
+            for number in range(1, size + 1)
+        )
+        Answer.objects.bulk_create(
+            Answer(question=question, number=number, answer=f"Ответ {number}")
+            for question in questions
+            for number in range(1, ANSWERS_PER_QUESTION + 1)
+        )
+
+        def serializer_path():
+            instance = Test.objects.prefetch_related("questions__answers").get(
+                pk=test.pk
+            )
+            return TestGetSerializer(instance).data
+
+        def fast_path():
+            return get_test_payload(test.pk)
+
+        if serializer_path() != fast_path():
+            raise CommandError(f"Payloads differ for a test with {size} questions")
+
+        serializer_ms = self.measure(serializer_path, repeat)
+        fast_ms = self.measure(fast_path, repeat)
+        self.stdout.write(
+            f"{size:>6} questions: serializer {serializer_ms:8.2f} ms, "
+            f"values() {fast_ms:8.2f} ms, x{serializer_ms / fast_ms:.1f}"
+        )
+
+    @staticmethod
+    def measure(func, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - start) * 1000 / repeat
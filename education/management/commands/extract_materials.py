@@ -0,0 +1,51 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from education.extraction import run_extraction
+
+
+class Command(BaseCommand):
+    help = "Извлечение текста материалов уроков для поиска в пуле процессов"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=settings.EXTRACTION_WORKERS)
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--poll-interval", type=float, default=10.0)
+        parser.add_argument(
+            "--once", action="store_true", help="Обработать материалы и завершиться"
+        )
+
+    def handle(self, *args, **options):
+        pool = None
+        if options["workers"] > 1:
+            pool = ProcessPoolExecutor(
+                max_workers=options["workers"], initializer=django.setup
+            )
+
+        extracted = 0
+        start = time.perf_counter()
+        try:
+            while True:
+                done = run_extraction(pool, options["batch_size"])
+                extracted += done
+                if done:
+                    self.stdout.write(f"Extracted text of {done} materials")
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Extracted text of {extracted} materials in {elapsed:.2f} s"
+            )
+        )
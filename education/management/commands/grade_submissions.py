@@ -0,0 +1,59 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from education.submissions import requeue_stale, run_worker
+
+
+class Command(BaseCommand):
+    help = "Проверка отправленных ответов из очереди пулом обработчиков"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=settings.SUBMISSION_WORKERS)
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.SUBMISSION_BATCH_SIZE
+        )
+        parser.add_argument("--poll-interval", type=float, default=1.0)
+        parser.add_argument(
+            "--stale-timeout",
+            type=int,
+            default=300,
+            help="Через сколько секунд вернуть в очередь зависшие отправки",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Обработать очередь и завершиться"
+        )
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale(options["stale_timeout"])
+        if requeued:
+            self.stdout.write(f"Returned {requeued} stale submissions to the queue")
+
+        stop_event = threading.Event()
+        worker_args = (
+            options["batch_size"],
+            options["poll_interval"],
+            stop_event,
+            options["once"],
+            options["stale_timeout"],
+        )
+
+        if options["workers"] <= 1:
+            processed = run_worker(*worker_args)
+        else:
+            with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+                futures = [
+                    pool.submit(run_worker, *worker_args)
+                    for _ in range(options["workers"])
+                ]
+                try:
+                    processed = sum(future.result() for future in futures)
+                except KeyboardInterrupt:
+                    stop_event.set()
+                    processed = sum(future.result() for future in futures)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Successfully graded {processed} submissions")
+        )
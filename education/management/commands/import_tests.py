@@ -0,0 +1,64 @@
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from education.importers import (
+    READERS,
+    ImportFormatError,
+    detect_format,
+    import_tests,
+)
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Импорт тестов из файлов JSON Lines, YAML или CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Путь к файлу с тестами")
+        parser.add_argument(
+            "--format", choices=sorted(READERS), help="Формат файла (по расширению)"
+        )
+        parser.add_argument("--owner", help="email владельца тестов")
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.IMPORT_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        try:
+            file_format = options["format"] or detect_format(options["path"])
+        except ImportFormatError as error:
+            raise CommandError(error)
+
+        owner = None
+        if options["owner"]:
+            owner = User.objects.filter(email=options["owner"]).first()
+            if owner is None:
+                raise CommandError(f"User {options['owner']} not found")
+
+        created = failed = 0
+        start = time.perf_counter()
+        with open(options["path"], encoding="utf-8", newline="") as stream:
+            for report in import_tests(
+                stream, file_format, owner, options["batch_size"]
+            ):
+                if report["status"] == "created":
+                    created += 1
+                    self.stdout.write(
+                        f"#{report['record']}: created test {report['id']}"
+                    )
+                else:
+                    failed += 1
+                    self.stderr.write(
+                        f"#{report['record']}: "
+                        f"{json.dumps(report['errors'], ensure_ascii=False)}"
+                    )
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {created} tests, {failed} failed in {elapsed:.2f} s"
+            )
+        )
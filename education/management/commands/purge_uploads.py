@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from education.uploads import purge_stale_uploads
+
+
+class Command(BaseCommand):
+    help = "Удаление брошенных загрузок материалов по частям и их файлов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours",
+            type=int,
+            default=settings.MATERIAL_UPLOAD_STALE_HOURS,
+            help="Сколько часов загрузка может не получать новых частей",
+        )
+
+    def handle(self, *args, **options):
+        uploads, files = purge_stale_uploads(timedelta(hours=options["hours"]))
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Purged {uploads} stale uploads, {files} files")
+        )
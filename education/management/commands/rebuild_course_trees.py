@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from education.course_trees import rebuild_section_trees
+
+
+class Command(BaseCommand):
+    help = "Пересборка предрассчитанных деревьев курса для разделов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--section", type=int, nargs="+", help="id разделов (по умолчанию все)"
+        )
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--stale", action="store_true", help="Только устаревшие деревья"
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        documents = rebuild_section_trees(
+            options["section"],
+            batch_size=options["batch_size"],
+            only_stale=options["stale"],
+        )
+        elapsed = time.perf_counter() - start
+
+        per_tree = elapsed * 1000 / len(documents) if documents else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {len(documents)} course trees in {elapsed:.2f} s "
+                f"({per_tree:.2f} ms per tree)"
+            )
+        )
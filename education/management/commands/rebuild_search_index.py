@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from education.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Полная перестройка поискового индекса разделов, уроков и тестов"
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = rebuild_index()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Indexed {count} objects in {time.perf_counter() - start:.2f} s"
+            )
+        )
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:42
+
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("education", "0005_remove_lesson_test_test_lesson"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name="useranswer",
+            unique_together={("user", "question")},
+        ),
+    ]
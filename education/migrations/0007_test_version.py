@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("education", "0006_useranswer_unique_user_question"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="test",
+            name="version",
+            field=models.PositiveIntegerField(default=1, verbose_name="Версия"),
+        ),
+    ]
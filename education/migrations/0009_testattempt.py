@@ -0,0 +1,90 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("education", "0008_submission"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TestAttempt",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("correct", models.PositiveIntegerField(verbose_name="Верных ответов")),
+                ("total", models.PositiveIntegerField(verbose_name="Всего вопросов")),
+                ("score", models.FloatField(verbose_name="Результат, %")),
+                ("submitted_at", models.DateTimeField(verbose_name="Отправлено")),
+                (
+                    "graded_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Проверено"),
+                ),
+                (
+                    "answers",
+                    models.ManyToManyField(
+                        blank=True,
+                        related_name="attempts",
+                        to="education.answer",
+                        verbose_name="Ответы",
+                    ),
+                ),
+                (
+                    "test",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="attempts",
+                        to="education.test",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="attempts",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "попытка",
+                "verbose_name_plural": "попытки",
+                "ordering": ["-graded_at"],
+            },
+        ),
+        migrations.AddField(
+            model_name="submission",
+            name="attempt",
+            field=models.OneToOneField(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to="education.testattempt",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="testattempt",
+            index=models.Index(
+                fields=["user", "test"], name="education_t_user_id_489c06_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="testattempt",
+            index=models.Index(
+                fields=["test", "score"], name="education_t_test_id_481e54_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("education", "0009_testattempt"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="test",
+            name="lesson",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="tests",
+                to="education.lesson",
+                verbose_name="Урок",
+            ),
+        ),
+    ]
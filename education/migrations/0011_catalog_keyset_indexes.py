@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("education", "0010_test_lesson_related_name"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="lesson",
+            index=models.Index(
+                fields=["title", "section", "id"], name="education_l_title_72a9be_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="section",
+            index=models.Index(
+                fields=["title", "id"], name="education_s_title_8ca77a_idx"
+            ),
+        ),
+    ]
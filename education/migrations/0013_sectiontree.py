@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("education", "0012_catalog_versions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SectionTree",
+            fields=[
+                (
+                    "section",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="tree",
+                        serialize=False,
+                        to="education.section",
+                    ),
+                ),
+                ("version", models.PositiveIntegerField(verbose_name="Версия раздела")),
+                ("document", models.JSONField(verbose_name="Дерево курса")),
+                (
+                    "built_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Собрано"),
+                ),
+            ],
+            options={
+                "verbose_name": "дерево курса",
+                "verbose_name_plural": "деревья курсов",
+            },
+        ),
+    ]
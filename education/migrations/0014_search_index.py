@@ -0,0 +1,98 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Выражение должно совпадать с education.search.TSVECTOR_SQL
+CREATE_GIN_INDEX = """
+CREATE INDEX education_searchdocument_fts ON education_searchdocument USING gin (
+    (setweight(to_tsvector('russian', title), 'A')
+     || setweight(to_tsvector('russian', body), 'B'))
+)
+"""
+
+
+def create_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(CREATE_GIN_INDEX)
+
+
+def drop_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS education_searchdocument_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("education", "0013_sectiontree"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchDocument",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("section", "Раздел"),
+                            ("lesson", "Урок"),
+                            ("test", "Тест"),
+                        ],
+                        max_length=10,
+                        verbose_name="Тип",
+                    ),
+                ),
+                (
+                    "object_id",
+                    models.PositiveBigIntegerField(verbose_name="id объекта"),
+                ),
+                ("title", models.CharField(max_length=255, verbose_name="Заголовок")),
+                ("body", models.TextField(blank=True, verbose_name="Текст")),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "поисковый документ",
+                "verbose_name_plural": "поисковые документы",
+                "unique_together": {("kind", "object_id")},
+            },
+        ),
+        migrations.CreateModel(
+            name="SearchTerm",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("term", models.CharField(max_length=100)),
+                ("weight", models.PositiveIntegerField()),
+                (
+                    "document",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="terms",
+                        to="education.searchdocument",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("term", "document")},
+            },
+        ),
+        migrations.RunPython(create_gin_index, drop_gin_index),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:09
+
+import django.core.validators
+import education.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("education", "0015_material_upload"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StoredFile",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(max_length=255, unique=True, verbose_name="Имя"),
+                ),
+                (
+                    "digest",
+                    models.CharField(
+                        db_index=True, max_length=64, verbose_name="SHA-256"
+                    ),
+                ),
+                ("size", models.PositiveBigIntegerField(verbose_name="Размер")),
+                (
+                    "references",
+                    models.PositiveIntegerField(default=0, verbose_name="Ссылок"),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "сохранённый файл",
+                "verbose_name_plural": "сохранённые файлы",
+            },
+        ),
+        migrations.AlterField(
+            model_name="lesson",
+            name="material",
+            field=models.FileField(
+                blank=True,
+                null=True,
+                storage=education.storage.ContentAddressedStorage(),
+                upload_to="documents/",
+                validators=[
+                    django.core.validators.FileExtensionValidator(
+                        allowed_extensions=["pdf", "doc", "docx", "txt", "xls", "xlsx"]
+                    )
+                ],
+                verbose_name="Материал к уроку",
+            ),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("education", "0016_content_storage"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MaterialText",
+            fields=[
+                (
+                    "lesson",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="material_text",
+                        serialize=False,
+                        to="education.lesson",
+                        verbose_name="Урок",
+                    ),
+                ),
+                (
+                    "material",
+                    models.CharField(max_length=255, verbose_name="Обработанный файл"),
+                ),
+                (
+                    "digest",
+                    models.CharField(blank=True, max_length=64, verbose_name="SHA-256"),
+                ),
+                ("text", models.TextField(blank=True, verbose_name="Текст")),
+                ("error", models.TextField(blank=True, verbose_name="Ошибка")),
+                (
+                    "extracted_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Извлечено"),
+                ),
+            ],
+            options={
+                "verbose_name": "текст материала",
+                "verbose_name_plural": "тексты материалов",
+            },
+        ),
+    ]
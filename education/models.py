@@ -1,10 +1,40 @@
+import uuid
+
 from django.core.validators import FileExtensionValidator
 from django.db import models
 
+from education.storage import StoredFilesMixin, content_storage
 from users.models import User
 
 
-class Section(models.Model):
+# Поля, которые меняет только touch() в education.signals
+VERSION_FIELDS = ("version", "updated_at")
+
+
+class VersionedMixin:
+    """ Сохранение объекта без версии и времени изменения
+
+    Иначе save() записал бы версию, прочитанную до изменения, поверх
+    увеличенной touch() за это время, и одна версия (ETag) досталась бы
+    разному содержимому.
+    """
+
+    def save(self, *args, update_fields=None, **kwargs):
+        if not self._state.adding:
+            if update_fields is None:
+                deferred = self.get_deferred_fields()
+                update_fields = [
+                    field.name
+                    for field in self._meta.concrete_fields
+                    if not field.primary_key and field.attname not in deferred
+                ]
+            update_fields = [
+                name for name in update_fields if name not in VERSION_FIELDS
+            ]
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+
+class Section(VersionedMixin, models.Model):
     """ Модель раздела """
     title = models.CharField(max_length=50, verbose_name="Название")
     description = models.TextField(verbose_name="Описание")
@@ -15,6 +45,8 @@ class Section(models.Model):
         blank=True,
         verbose_name="владелец",
     )
+    version = models.PositiveIntegerField(default=1, verbose_name="Версия")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Изменено")
 
     def __str__(self):
         return f"{self.id} ({self.title})"
@@ -23,14 +55,34 @@ class Section(models.Model):
         verbose_name = "Раздел"
         verbose_name_plural = "Разделы"
         ordering = ["title"]
+        indexes = [models.Index(fields=["title", "id"])]
+
 
+class SectionTree(models.Model):
+    """ Модель предрассчитанного дерева курса для раздела """
+
+    section = models.OneToOneField(
+        Section, on_delete=models.CASCADE, primary_key=True, related_name="tree"
+    )
+    version = models.PositiveIntegerField(verbose_name="Версия раздела")
+    document = models.JSONField(verbose_name="Дерево курса")
+    built_at = models.DateTimeField(auto_now=True, verbose_name="Собрано")
 
-class Lesson(models.Model):
+    class Meta:
+        verbose_name = "дерево курса"
+        verbose_name_plural = "деревья курсов"
+
+    def __str__(self):
+        return f"{self.section_id} (v{self.version})"
+
+
+class Lesson(VersionedMixin, StoredFilesMixin, models.Model):
     """ Модель Урока """
     title = models.CharField(max_length=100, verbose_name="Название")
     description = models.TextField(verbose_name="Описание")
     material = models.FileField(
         upload_to="documents/",
+        storage=content_storage,
         validators=[
             FileExtensionValidator(
                 allowed_extensions=["pdf", "doc", "docx", "txt", "xls", "xlsx"]
@@ -50,6 +102,8 @@ class Lesson(models.Model):
         blank=True,
         verbose_name="владелец",
     )
+    version = models.PositiveIntegerField(default=1, verbose_name="Версия")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Изменено")
 
     def __str__(self):
         return f"{self.title} ({self.section.title})"
@@ -58,14 +112,20 @@ class Lesson(models.Model):
         verbose_name = "урок"
         verbose_name_plural = "уроки"
         ordering = ["title", "section"]
+        indexes = [models.Index(fields=["title", "section", "id"])]
 
 
-class Test(models.Model):
+class Test(VersionedMixin, models.Model):
     """ Модель теста """
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     lesson = models.ForeignKey(
-        Lesson, on_delete=models.CASCADE, null=True, blank=True, verbose_name="Урок"
+        Lesson,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="tests",
+        verbose_name="Урок",
     )
     owner = models.ForeignKey(
         User,
@@ -74,6 +134,8 @@ class Test(models.Model):
         blank=True,
         verbose_name="владелец",
     )
+    version = models.PositiveIntegerField(default=1, verbose_name="Версия")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Изменено")
 
     def __str__(self):
         return f"{self.id} ({self.title})"
@@ -116,3 +178,180 @@ class UserAnswer(models.Model):
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
     answer = models.ForeignKey(Answer, on_delete=models.CASCADE)
     submitted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("user", "question")
+
+
+class TestAttempt(models.Model):
+    """ Модель попытки прохождения теста """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="attempts")
+    test = models.ForeignKey(Test, on_delete=models.CASCADE, related_name="attempts")
+    correct = models.PositiveIntegerField(verbose_name="Верных ответов")
+    total = models.PositiveIntegerField(verbose_name="Всего вопросов")
+    score = models.FloatField(verbose_name="Результат, %")
+    answers = models.ManyToManyField(
+        Answer, related_name="attempts", blank=True, verbose_name="Ответы"
+    )
+    submitted_at = models.DateTimeField(verbose_name="Отправлено")
+    graded_at = models.DateTimeField(auto_now_add=True, verbose_name="Проверено")
+
+    class Meta:
+        verbose_name = "попытка"
+        verbose_name_plural = "попытки"
+        ordering = ["-graded_at"]
+        indexes = [
+            models.Index(fields=["user", "test"]),
+            models.Index(fields=["test", "score"]),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.test.title} ({self.score} %)"
+
+
+class Submission(models.Model):
+    """ Модель отправки ответов в очереди на проверку """
+
+    PENDING = "pending"
+    PROCESSING = "processing"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "В очереди"),
+        (PROCESSING, "Проверяется"),
+        (DONE, "Проверено"),
+        (FAILED, "Ошибка"),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    test = models.ForeignKey(Test, on_delete=models.CASCADE)
+    payload = models.JSONField(verbose_name="Ответы")
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=PENDING, verbose_name="Статус"
+    )
+    worker = models.CharField(max_length=100, blank=True, verbose_name="Обработчик")
+    result = models.JSONField(null=True, blank=True, verbose_name="Результат")
+    attempt = models.OneToOneField(
+        TestAttempt, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    error = models.TextField(blank=True, verbose_name="Ошибка")
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "отправка ответов"
+        verbose_name_plural = "отправки ответов"
+        indexes = [models.Index(fields=["status", "id"])]
+
+    def __str__(self):
+        return f"{self.id} ({self.status})"
+
+
+class SearchDocument(models.Model):
+    """ Модель документа поискового индекса """
+
+    SECTION = "section"
+    LESSON = "lesson"
+    TEST = "test"
+    KIND_CHOICES = [(SECTION, "Раздел"), (LESSON, "Урок"), (TEST, "Тест")]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, verbose_name="Тип")
+    object_id = models.PositiveBigIntegerField(verbose_name="id объекта")
+    title = models.CharField(max_length=255, verbose_name="Заголовок")
+    body = models.TextField(blank=True, verbose_name="Текст")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "поисковый документ"
+        verbose_name_plural = "поисковые документы"
+        unique_together = ("kind", "object_id")
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} ({self.title})"
+
+
+class SearchTerm(models.Model):
+    """ Модель термина инвертированного индекса (для баз без полнотекстового поиска) """
+
+    term = models.CharField(max_length=100)
+    document = models.ForeignKey(
+        SearchDocument, on_delete=models.CASCADE, related_name="terms"
+    )
+    weight = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ("term", "document")
+
+
+class MaterialUpload(models.Model):
+    """ Модель возобновляемой загрузки материала урока по частям """
+
+    UPLOADING = "uploading"
+    COMPLETE = "complete"
+    STATUS_CHOICES = [
+        (UPLOADING, "Загружается"),
+        (COMPLETE, "Загружено"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    lesson = models.ForeignKey(
+        Lesson, on_delete=models.CASCADE, related_name="uploads", verbose_name="Урок"
+    )
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="владелец")
+    filename = models.CharField(max_length=255, verbose_name="Имя файла")
+    size = models.PositiveBigIntegerField(verbose_name="Размер")
+    checksum = models.CharField(max_length=64, blank=True, verbose_name="SHA-256")
+    offset = models.PositiveBigIntegerField(default=0, verbose_name="Загружено байт")
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=UPLOADING, verbose_name="Статус"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "загрузка материала"
+        verbose_name_plural = "загрузки материалов"
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+
+class StoredFile(models.Model):
+    """ Модель файла в хранилище по содержимому со счётчиком ссылок """
+    name = models.CharField(max_length=255, unique=True, verbose_name="Имя")
+    digest = models.CharField(max_length=64, db_index=True, verbose_name="SHA-256")
+    size = models.PositiveBigIntegerField(verbose_name="Размер")
+    references = models.PositiveIntegerField(default=0, verbose_name="Ссылок")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "сохранённый файл"
+        verbose_name_plural = "сохранённые файлы"
+
+    def __str__(self):
+        return f"{self.name} ({self.references})"
+
+
+class MaterialText(models.Model):
+    """ Модель извлечённого текста материала урока """
+    lesson = models.OneToOneField(
+        Lesson,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="material_text",
+        verbose_name="Урок",
+    )
+    material = models.CharField(max_length=255, verbose_name="Обработанный файл")
+    digest = models.CharField(max_length=64, blank=True, verbose_name="SHA-256")
+    text = models.TextField(blank=True, verbose_name="Текст")
+    error = models.TextField(blank=True, verbose_name="Ошибка")
+    extracted_at = models.DateTimeField(auto_now=True, verbose_name="Извлечено")
+
+    class Meta:
+        verbose_name = "текст материала"
+        verbose_name_plural = "тексты материалов"
+
+    def __str__(self):
+        return f"{self.lesson_id} ({self.material})"
@@ -1,7 +1,174 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from binascii import Error as BinasciiError
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class EducationPaginator(PageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 100
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """ Асинхронный вариант paginate_queryset для ASGI-представлений """
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(
+                self.invalid_page_message.format(
+                    page_number=page_number, message=str(exc)
+                )
+            )
+        self.page.object_list = [obj async for obj in self.page.object_list]
+        return list(self.page)
+
+
+class EducationCursorPaginator(BasePagination):
+    """ Пагинация по ключу сортировки (keyset) без OFFSET """
+
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.prepare_queryset(queryset, request, view)
+        if self.count_requested(request):
+            self.count = queryset.count()
+        return self.get_page(list(self.page_queryset(queryset)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """ Асинхронный вариант paginate_queryset для ASGI-представлений """
+        queryset = self.prepare_queryset(queryset, request, view)
+        if self.count_requested(request):
+            self.count = await queryset.acount()
+        return self.get_page([obj async for obj in self.page_queryset(queryset)])
+
+    def prepare_queryset(self, queryset, request, view):
+        self.request = request
+        self.ordering = view.cursor_ordering
+        self.page_size = self.get_page_size(request)
+        self.position = self.decode_cursor(request)
+        if self.position is not None:
+            self.position = self.clean_position(queryset.model, self.position)
+        self.count = None
+        return queryset.order_by(*self.ordering)
+
+    def clean_position(self, model, position):
+        """ Приведение значений курсора к типам полей сортировки """
+        if not all(isinstance(value, (str, int, float)) for value in position):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            cleaned = [
+                model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (FieldDoesNotExist, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return cleaned
+
+    def count_requested(self, request):
+        return request.query_params.get(self.count_query_param) in ("1", "true")
+
+    def page_queryset(self, queryset):
+        if self.position is not None:
+            queryset = queryset.filter(self.get_position_filter(self.position))
+        return queryset[: self.page_size + 1]
+
+    def get_page(self, results):
+        self.has_next = len(results) > self.page_size
+        results = results[: self.page_size]
+        self.next_position = None
+        if self.has_next:
+            self.next_position = [getattr(results[-1], f) for f in self.ordering]
+        return results
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_position_filter(self, position):
+        """ Условие "строго после позиции" для составного ключа сортировки """
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            equal = dict(zip(self.ordering[:index], position[:index]))
+            condition |= Q(**equal, **{f"{field}__gt": position[index]})
+        return condition
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+        except (BinasciiError, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def encode_cursor(self, position):
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.count_query_param)
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.next_position)
+        )
+
+    def get_paginated_response(self, data):
+        payload = {"next": self.get_next_link(), "results": data}
+        if self.count is not None:
+            payload = {"count": self.count, **payload}
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "count": {"type": "integer", "example": 123},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class CursorPaginationMixin:
+    """ Выбор пагинации по ключу через ?pagination=cursor или ?cursor= """
+
+    cursor_pagination_class = EducationCursorPaginator
+    cursor_ordering = None
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            params = getattr(self.request, "query_params", {})
+            if params.get("pagination") == "cursor" or "cursor" in params:
+                self._paginator = self.cursor_pagination_class()
+        return super().paginator
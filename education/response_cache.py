@@ -0,0 +1,183 @@
+import hashlib
+import threading
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+HITS_KEY = "catalog:stats:hits"
+MISSES_KEY = "catalog:stats:misses"
+
+
+def get_cache():
+    return caches[settings.CATALOG_CACHE_ALIAS]
+
+
+def generation_key(namespace):
+    return f"catalog:generation:{namespace}"
+
+
+def get_generations(namespaces):
+    """ Текущие поколения пространств имён кеша """
+    cache = get_cache()
+    keys = [generation_key(namespace) for namespace in namespaces]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def invalidate(*namespaces):
+    """ Сброс закешированных ответов сменой поколения пространств имён """
+    get_cache().set_many(
+        {generation_key(namespace): uuid.uuid4().hex for namespace in namespaces},
+        timeout=None,
+    )
+
+
+class CacheStats:
+    """ Счётчики попаданий и промахов в памяти процесса
+
+    В кеш каталога они прибавляются не чаще раза в flush_interval секунд,
+    а не на каждом запросе. Точные суммы по всем процессам требуют
+    бэкенда с атомарным incr (Redis, Memcached): на файловом кеше часть
+    прибавлений может потеряться, а вытеснение по MAX_ENTRIES — удалить
+    счётчики.
+    """
+
+    def __init__(self, flush_interval):
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self._counts = {HITS_KEY: 0, MISSES_KEY: 0}
+        self._flushed_at = time.monotonic()
+
+    def take(self):
+        """ Накопленные счётчики с обнулением или None, если их нет """
+        with self._lock:
+            counts = {key: count for key, count in self._counts.items() if count}
+            self.clear()
+        return counts or None
+
+    def record(self, key):
+        """ Учёт обращения, возвращает счётчики, которые пора сбросить в кеш """
+        with self._lock:
+            self._counts[key] += 1
+            due = time.monotonic() - self._flushed_at >= self.flush_interval
+        return self.take() if due else None
+
+
+cache_stats = CacheStats(settings.CATALOG_CACHE_STATS_INTERVAL)
+
+
+def add_counts(counts):
+    cache = get_cache()
+    for key, count in counts.items():
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key, count)
+        except ValueError:
+            cache.set(key, count, timeout=None)
+
+
+def increment(key):
+    counts = cache_stats.record(key)
+    if counts:
+        add_counts(counts)
+
+
+async def aincrement(key):
+    counts = cache_stats.record(key)
+    if counts:
+        await sync_to_async(add_counts)(counts)
+
+
+def get_cache_stats():
+    """ Счётчики попаданий и промахов кеша каталога """
+    counts = cache_stats.take()
+    if counts:
+        add_counts(counts)
+    stats = get_cache().get_many([HITS_KEY, MISSES_KEY])
+    hits = stats.get(HITS_KEY, 0)
+    misses = stats.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 4) if total else None,
+    }
+
+
+class CachedResponseMixin:
+    """ Кеширование ответов публичных эндпоинтов каталога """
+
+    cache_namespaces = ()
+
+    def get_cache_namespaces(self):
+        return [namespace.format(**self.kwargs) for namespace in self.cache_namespaces]
+
+    def get_cache_key(self, request):
+        generations = get_generations(self.get_cache_namespaces())
+        return self.build_cache_key(request, generations)
+
+    def get_cache_version(self):
+        """ Версия объекта ответа, если она известна до обращения к кешу """
+        return None
+
+    def build_cache_key(self, request, generations):
+        query = sorted(request.query_params.lists())
+        version = self.get_cache_version()
+        raw = f"{request.get_host()}|{request.path}|{query}|{generations}|{version}"
+        return f"catalog:response:{hashlib.md5(raw.encode()).hexdigest()}"
+
+    def lookup(self, request):
+        """ Ключ и закешированные данные ответа (None, если их нет) """
+        key = self.get_cache_key(request)
+        return key, get_cache().get(key)
+
+    def store(self, key, data):
+        get_cache().set(key, data, settings.CATALOG_CACHE_TIMEOUT)
+        increment(MISSES_KEY)
+
+    def get(self, request, *args, **kwargs):
+        key, data = self.lookup(request)
+        if data is not None:
+            increment(HITS_KEY)
+            response = Response(data)
+            response["X-Cache"] = "HIT"
+            return response
+
+        response = super().get(request, *args, **kwargs)
+        if isinstance(response, Response) and response.status_code == 200:
+            self.store(key, response.data)
+            response["X-Cache"] = "MISS"
+        return response
+
+
+class AsyncCachedResponseMixin(CachedResponseMixin):
+    """ Асинхронный вариант CachedResponseMixin для ASGI-представлений
+
+    Поколения и ответ читаются из кеша одним вызовом sync_to_async: каждый
+    асинхронный метод кеша Django — отдельный переход в поток.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        key, data = await sync_to_async(self.lookup)(request)
+        if data is not None:
+            await aincrement(HITS_KEY)
+            response = Response(data)
+            response["X-Cache"] = "HIT"
+            return response
+
+        response = await super().get(request, *args, **kwargs)
+        if isinstance(response, Response) and response.status_code == 200:
+            await sync_to_async(self.store)(key, response.data)
+            response["X-Cache"] = "MISS"
+        return response
@@ -0,0 +1,129 @@
+import re
+from collections import Counter
+
+from django.db import connection
+from django.db.models import Count, Sum
+
+from education.models import (
+    Lesson,
+    MaterialText,
+    SearchDocument,
+    SearchTerm,
+    Section,
+    Test,
+)
+
+TITLE_WEIGHT = 3
+BODY_WEIGHT = 1
+
+# Выражение должно совпадать с GIN-индексом из миграции 0014_search_index
+TSVECTOR_SQL = (
+    "(setweight(to_tsvector('russian', title), 'A')"
+    " || setweight(to_tsvector('russian', body), 'B'))"
+)
+
+SEARCH_SQL = f"""
+SELECT id, ts_rank({TSVECTOR_SQL}, query) AS rank
+FROM education_searchdocument, plainto_tsquery('russian', %s) AS query
+WHERE {TSVECTOR_SQL} @@ query
+ORDER BY rank DESC, id
+LIMIT %s
+"""
+
+KINDS = {
+    Section: SearchDocument.SECTION,
+    Lesson: SearchDocument.LESSON,
+    Test: SearchDocument.TEST,
+}
+
+
+def tokenize(text):
+    """ Разбиение текста на термины для инвертированного индекса """
+    return [term[:100] for term in re.findall(r"\w+", text.lower()) if len(term) > 1]
+
+
+def uses_full_text():
+    return connection.vendor == "postgresql"
+
+
+def document_body(instance):
+    """ Текст документа: описание и, для уроков, текст материала """
+    if not isinstance(instance, Lesson):
+        return instance.description
+    material_text = (
+        MaterialText.objects.filter(lesson=instance.pk)
+        .values_list("text", flat=True)
+        .first()
+    )
+    return " ".join(filter(None, [instance.description, material_text]))
+
+
+def index_object(instance):
+    """ Обновление поискового документа объекта каталога """
+    document, _ = SearchDocument.objects.update_or_create(
+        kind=KINDS[type(instance)],
+        object_id=instance.pk,
+        defaults={"title": instance.title, "body": document_body(instance)},
+    )
+    if not uses_full_text():
+        index_terms(document)
+    return document
+
+
+def index_terms(document):
+    weights = Counter()
+    for term in tokenize(document.title):
+        weights[term] += TITLE_WEIGHT
+    for term in tokenize(document.body):
+        weights[term] += BODY_WEIGHT
+
+    document.terms.all().delete()
+    SearchTerm.objects.bulk_create(
+        SearchTerm(term=term, document=document, weight=weight)
+        for term, weight in weights.items()
+    )
+
+
+def remove_object(instance):
+    SearchDocument.objects.filter(
+        kind=KINDS[type(instance)], object_id=instance.pk
+    ).delete()
+
+
+def search(query, limit=20):
+    """ Поиск по разделам, урокам и тестам, отсортированный по релевантности """
+    if uses_full_text():
+        with connection.cursor() as cursor:
+            cursor.execute(SEARCH_SQL, [query, limit])
+            ranks = dict(cursor.fetchall())
+    else:
+        terms = set(tokenize(query))
+        ranks = dict(
+            SearchTerm.objects.filter(term__in=terms)
+            .values("document")
+            .annotate(matched=Count("term"), rank=Sum("weight"))
+            .order_by("-matched", "-rank", "document")
+            .values_list("document", "rank")[:limit]
+        )
+
+    documents = SearchDocument.objects.in_bulk(ranks)
+    return [
+        {
+            "type": documents[pk].kind,
+            "id": documents[pk].object_id,
+            "title": documents[pk].title,
+            "rank": rank,
+        }
+        for pk, rank in ranks.items()
+    ]
+
+
+def rebuild_index():
+    """ Полная перестройка поискового индекса """
+    SearchDocument.objects.all().delete()
+    count = 0
+    for model in KINDS:
+        for instance in model.objects.iterator(chunk_size=500):
+            index_object(instance)
+            count += 1
+    return count
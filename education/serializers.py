@@ -1,6 +1,19 @@
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
-from education.models import Section, Lesson, Test, Question, Answer
+from education.fieldsets import ExpandableFieldsMixin
+from education.services import bulk_create_questions, sync_questions
+from education.models import (
+    Section,
+    Lesson,
+    Test,
+    Question,
+    Answer,
+    Submission,
+    TestAttempt,
+    MaterialUpload,
+)
 
 
 class AnswerGetSerializer(serializers.ModelSerializer):
@@ -9,41 +22,47 @@ class AnswerGetSerializer(serializers.ModelSerializer):
         fields = ["number", "answer"]
 
 
-class QuestionGetSerializer(serializers.ModelSerializer):
+class QuestionGetSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
     answers = AnswerGetSerializer(many=True, required=False)
 
     class Meta:
         model = Question
         fields = ["number", "question", "answers"]
+        expandable_fields = {"answers": True}
 
 
-class TestGetSerializer(serializers.ModelSerializer):
+class TestGetSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
     questions = QuestionGetSerializer(many=True, required=False)
 
     class Meta:
         model = Test
         fields = ["id", "title", "description", "lesson", "questions", "owner"]
+        expandable_fields = {"questions": True}
 
 
-class LessonSerializer(ModelSerializer):
+class LessonSerializer(ExpandableFieldsMixin, ModelSerializer):
     tests = TestGetSerializer(many=True, read_only=True)
 
     class Meta:
         model = Lesson
-        fields = "__all__"
+        exclude = ["version", "updated_at"]
+        expandable_fields = {"tests": False}
 
 
-class SectionSerializer(ModelSerializer):
+class SectionSerializer(ExpandableFieldsMixin, ModelSerializer):
     number_of_lessons = serializers.SerializerMethodField()
     lessons = LessonSerializer(many=True, read_only=True)
 
     @staticmethod
     def get_number_of_lessons(instance):
+        if hasattr(instance, "lessons_count"):
+            return instance.lessons_count
         return instance.lessons.count()
 
     class Meta:
         model = Section
-        fields = "__all__"
+        exclude = ["version", "updated_at"]
+        expandable_fields = {"lessons": True}
 
 
 class AnswerSerializer(serializers.ModelSerializer):
@@ -67,29 +86,104 @@ class TestSerializer(serializers.ModelSerializer):
         model = Test
         fields = ["id", "title", "description", "lesson", "questions", "owner"]
 
+    def validate_questions(self, questions):
+        numbers = [question["number"] for question in questions]
+        if len(numbers) != len(set(numbers)):
+            raise serializers.ValidationError(
+                "Номера вопросов должны быть уникальными."
+            )
+        for question in questions:
+            answer_numbers = [
+                answer["number"] for answer in question.get("answers", [])
+            ]
+            if len(answer_numbers) != len(set(answer_numbers)):
+                raise serializers.ValidationError(
+                    f"Номера ответов вопроса {question['number']} должны быть уникальными."
+                )
+        return questions
+
     def create(self, validated_data):
+        from education.signals import test_content_changed
+
         questions_data = validated_data.pop("questions", [])
-        test = Test.objects.create(**validated_data)
-
-        for question_data in questions_data:
-            answers_data = question_data.pop("answers", [])
-            question = Question.objects.create(test=test, **question_data)
-
-            for answer_data in answers_data:
-                answer_number = answer_data.get("number")
-                answer_text = answer_data.get("answer")
-                is_correct = answer_data.get("is_correct", False)
-
-                Answer.objects.create(
-                    question=question,
-                    number=answer_number,
-                    answer=answer_text,
-                    is_correct=is_correct,
-                )
+        with transaction.atomic():
+            test = Test.objects.create(**validated_data)
+            if questions_data:
+                bulk_create_questions([(test, questions_data)])
+                test_content_changed(test.id)
+
+        prefetch_related_objects([test], "questions__answers")
 
         return test
 
+    def update(self, instance, validated_data):
+        from education.signals import test_content_changed
+
+        questions_data = validated_data.pop("questions", None)
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            if questions_data is not None and sync_questions(instance, questions_data):
+                test_content_changed(instance.id)
+
+        return instance
+
+
+class ImportTestSerializer(TestSerializer):
+    """ Тест из файла импорта: id и владелец из выгрузки не переносятся """
+
+    class Meta(TestSerializer.Meta):
+        fields = ["title", "description", "lesson", "questions"]
+
 
 class UserAnswerSerializer(serializers.Serializer):
     question_number = serializers.IntegerField()
     answer_number = serializers.IntegerField()
+
+
+class SubmissionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Submission
+        fields = [
+            "id",
+            "test",
+            "status",
+            "result",
+            "error",
+            "created_at",
+            "processed_at",
+        ]
+
+
+class TestAttemptSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TestAttempt
+        fields = [
+            "id",
+            "user",
+            "test",
+            "correct",
+            "total",
+            "score",
+            "submitted_at",
+            "graded_at",
+        ]
+
+
+class MaterialUploadSerializer(serializers.ModelSerializer):
+    checksum = serializers.RegexField(
+        r"^[0-9a-fA-F]{64}$", required=False, allow_blank=True
+    )
+
+    class Meta:
+        model = MaterialUpload
+        fields = [
+            "id",
+            "lesson",
+            "filename",
+            "size",
+            "checksum",
+            "offset",
+            "status",
+            "created_at",
+        ]
+        read_only_fields = ["lesson", "offset", "status"]
@@ -0,0 +1,178 @@
+from django.db import transaction
+from django.utils import timezone
+
+from education.answer_keys import get_answer_key
+from education.models import Answer, Question, TestAttempt, UserAnswer
+
+
+class GradingError(Exception):
+    """ Ошибка проверки ответов пользователя """
+
+
+def grade_answers(test, user, answers_data, submitted_at=None):
+    """ Проверка ответов на тест по скомпилированному ключу ответов """
+    key = get_answer_key(test)
+    if not key.total:
+        raise GradingError(f"В тесте '{test.title}' нет вопросов.")
+
+    correct_count = 0
+    user_answers = {}
+
+    for ans in answers_data:
+        q_num = ans["question_number"]
+        a_num = ans["answer_number"]
+
+        if q_num not in key.questions:
+            raise GradingError(
+                f"Вопрос с номером {q_num} не найден в тесте '{test.title}'."
+            )
+        question_id, answers, correct = key.questions[q_num]
+
+        if a_num not in answers:
+            raise GradingError(f"У вопроса {q_num} нет ответа с номером {a_num}.")
+
+        user_answers[question_id] = UserAnswer(
+            user=user, question_id=question_id, answer_id=answers[a_num]
+        )
+
+        if a_num in correct:
+            correct_count += 1
+
+    with transaction.atomic():
+        UserAnswer.objects.bulk_create(
+            user_answers.values(),
+            update_conflicts=True,
+            unique_fields=["user", "question"],
+            update_fields=["answer"],
+        )
+        attempt = TestAttempt.objects.create(
+            user=user,
+            test=test,
+            correct=correct_count,
+            total=key.total,
+            score=round((correct_count / key.total) * 100, 2),
+            submitted_at=submitted_at or timezone.now(),
+        )
+        TestAttempt.answers.through.objects.bulk_create(
+            TestAttempt.answers.through(
+                testattempt_id=attempt.id, answer_id=user_answer.answer_id
+            )
+            for user_answer in user_answers.values()
+        )
+
+    return attempt
+
+
+def build_result(attempt):
+    """ Результат проверки теста в формате ответа API """
+    return {
+        "test": attempt.test.title,
+        "correct": attempt.correct,
+        "total": attempt.total,
+        "score": f"{attempt.score} %",
+    }
+
+
+def bulk_create_questions(tests_questions):
+    """ Создание вопросов и ответов нескольких тестов пачками """
+    questions = []
+    answers_data = []
+    for test, questions_data in tests_questions:
+        for question_data in questions_data:
+            questions.append(
+                Question(
+                    test=test,
+                    number=question_data["number"],
+                    question=question_data["question"],
+                )
+            )
+            answers_data.append(question_data.get("answers", []))
+
+    Question.objects.bulk_create(questions)
+    Answer.objects.bulk_create(
+        Answer(question=question, **answer_data)
+        for question, question_answers in zip(questions, answers_data)
+        for answer_data in question_answers
+    )
+
+
+def sync_questions(test, questions_data):
+    """ Приведение вопросов и ответов теста к переданным по номерам
+
+    Изменяются только отличающиеся строки. Вопросы, которых нет в
+    questions_data, удаляются; ответы вопроса сверяются, только если
+    передан ключ "answers". Возвращает True, если что-то изменилось;
+    тогда версии и кеши теста обновляет вызывающий код.
+    """
+    from education.signals import suppress_content_signals
+
+    existing = {
+        question.number: question
+        for question in test.questions.prefetch_related("answers")
+    }
+    incoming = {data["number"]: data for data in questions_data}
+
+    new_questions = []
+    changed_questions = []
+    new_answers = []
+    changed_answers = []
+    deleted_answers = []
+
+    for number, data in incoming.items():
+        question = existing.get(number)
+        if question is None:
+            new_questions.append(data)
+            continue
+
+        if question.question != data["question"]:
+            question.question = data["question"]
+            changed_questions.append(question)
+
+        if "answers" not in data:
+            continue
+
+        existing_answers = {answer.number: answer for answer in question.answers.all()}
+        incoming_answers = {answer["number"]: answer for answer in data["answers"]}
+        for answer_number, answer_data in incoming_answers.items():
+            answer = existing_answers.get(answer_number)
+            if answer is None:
+                new_answers.append(Answer(question=question, **answer_data))
+                continue
+            is_correct = answer_data.get("is_correct", False)
+            if (
+                answer.answer != answer_data["answer"]
+                or answer.is_correct != is_correct
+            ):
+                answer.answer = answer_data["answer"]
+                answer.is_correct = is_correct
+                changed_answers.append(answer)
+        deleted_answers += [
+            answer.id
+            for answer_number, answer in existing_answers.items()
+            if answer_number not in incoming_answers
+        ]
+
+    deleted_questions = [
+        question.id for number, question in existing.items() if number not in incoming
+    ]
+
+    with suppress_content_signals():
+        if deleted_questions:
+            Question.objects.filter(id__in=deleted_questions).delete()
+        if deleted_answers:
+            Answer.objects.filter(id__in=deleted_answers).delete()
+    Question.objects.bulk_update(changed_questions, ["question"])
+    Answer.objects.bulk_update(changed_answers, ["answer", "is_correct"])
+    Answer.objects.bulk_create(new_answers)
+    bulk_create_questions([(test, new_questions)])
+
+    return any(
+        [
+            new_questions,
+            changed_questions,
+            new_answers,
+            changed_answers,
+            deleted_answers,
+            deleted_questions,
+        ]
+    )
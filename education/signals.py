@@ -0,0 +1,216 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.db import transaction
+from django.db.models import F, QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from education.answer_keys import answer_key_cache
+from education.course_trees import rebuild_section_trees
+from education.models import Answer, Lesson, Question, Section, Test
+from education.response_cache import invalidate
+from education.search import index_object, remove_object
+from education.storage import file_replaced, is_new_file, release_file
+
+
+def touch(model, **filters):
+    """ Увеличение версии и времени изменения объектов каталога """
+    model.objects.filter(**filters).update(
+        version=F("version") + 1, updated_at=timezone.now()
+    )
+
+
+def touch_sections(**filters):
+    """ Обновление версий разделов и сброс закешированных ответов каталога """
+    section_ids = list(Section.objects.filter(**filters).values_list("id", flat=True))
+    if section_ids:
+        touch(Section, pk__in=section_ids)
+        schedule_tree_rebuild(section_ids)
+    invalidate_on_commit(
+        "sections",
+        "lessons",
+        *(f"section:{section_id}" for section_id in section_ids),
+    )
+
+
+def invalidate_on_commit(*namespaces):
+    """ Сброс кеша каталога после коммита, когда изменения уже видны другим
+
+    При сбросе до коммита параллельный запрос успевает закешировать
+    старые данные под новым поколением.
+    """
+    transaction.on_commit(partial(invalidate, *namespaces))
+
+
+def schedule_tree_rebuild(section_ids):
+    """ Пересборка деревьев курса затронутых разделов после коммита """
+    transaction.on_commit(partial(rebuild_section_trees, section_ids, only_stale=True))
+
+
+def bump_test_version(**filters):
+    """ Увеличение версии теста после изменения вопросов или ответов """
+    touch(Test, **filters)
+
+
+def is_cascade(sender, origin):
+    """ Удаление вызвано каскадом от родительского объекта """
+    if isinstance(origin, QuerySet):
+        return origin.model is not sender
+    return not isinstance(origin, sender)
+
+
+# Обработчики удаления вопросов и ответов отключены (см. suppress_content_signals)
+content_signals_suppressed = ContextVar("content_signals_suppressed", default=False)
+
+
+@contextmanager
+def suppress_content_signals():
+    """ Удаление вопросов и ответов без обработчиков на каждую строку
+
+    Версии и кеши теста после этого обновляет вызывающий код, один раз.
+    """
+    token = content_signals_suppressed.set(True)
+    try:
+        yield
+    finally:
+        content_signals_suppressed.reset(token)
+
+
+def previous_values(instance, *fields):
+    """ Значения полей в базе данных до сохранения объекта """
+    if instance._state.adding:
+        return {}
+    return type(instance).objects.filter(pk=instance.pk).values(*fields).first() or {}
+
+
+def previous_value(instance, field):
+    return previous_values(instance, field).get(field)
+
+
+@receiver(pre_save, sender=Lesson)
+def lesson_moving(sender, instance, update_fields=None, **kwargs):
+    previous = previous_values(instance, "section_id", "material")
+    instance._previous_section_id = previous.get("section_id")
+    instance._previous_material = previous.get("material")
+    instance._material_stored = is_new_file(instance.material, update_fields)
+
+
+@receiver(pre_save, sender=Test)
+def test_moving(sender, instance, **kwargs):
+    instance._previous_lesson_id = previous_value(instance, "lesson_id")
+
+
+@receiver(post_save, sender=Section)
+def section_saved(sender, instance, created, **kwargs):
+    if not created:
+        touch(Section, pk=instance.pk)
+    schedule_tree_rebuild([instance.pk])
+    invalidate_on_commit("sections", f"section:{instance.pk}")
+
+
+@receiver(post_delete, sender=Section)
+def section_deleted(sender, instance, **kwargs):
+    invalidate_on_commit("sections", "lessons", f"section:{instance.pk}")
+
+
+@receiver(post_save, sender=Lesson)
+def lesson_saved(sender, instance, created, **kwargs):
+    if not created:
+        touch(Lesson, pk=instance.pk)
+    section_ids = {instance.section_id, getattr(instance, "_previous_section_id", None)}
+    touch_sections(pk__in=section_ids - {None})
+    file_replaced(
+        getattr(instance, "_previous_material", None) or None,
+        instance.material.name or None,
+        stored=getattr(instance, "_material_stored", False),
+    )
+
+
+@receiver(post_delete, sender=Lesson)
+def lesson_deleted(sender, instance, origin=None, **kwargs):
+    release_file(instance.material.name)
+    if not is_cascade(sender, origin):
+        touch_sections(pk=instance.section_id)
+
+
+@receiver(post_save, sender=Test)
+def test_saved(sender, instance, created, **kwargs):
+    answer_key_cache.invalidate(instance.id)
+    if not created:
+        touch(Test, pk=instance.pk)
+    lesson_ids = {instance.lesson_id, getattr(instance, "_previous_lesson_id", None)}
+    lesson_ids.discard(None)
+    if lesson_ids:
+        touch(Lesson, pk__in=lesson_ids)
+        touch_sections(lessons__in=lesson_ids)
+
+
+@receiver(post_delete, sender=Test)
+def test_deleted(sender, instance, origin=None, **kwargs):
+    answer_key_cache.invalidate(instance.id)
+    if not is_cascade(sender, origin) and instance.lesson_id:
+        touch(Lesson, pk=instance.lesson_id)
+        touch_sections(lessons=instance.lesson_id)
+
+
+def test_content_changed(test_id):
+    """ Обновление версий и кешей после изменения вопросов или ответов теста """
+    bump_test_version(pk=test_id)
+    answer_key_cache.invalidate(test_id)
+    touch(Lesson, tests=test_id)
+    touch_sections(lessons__tests=test_id)
+
+
+def tests_created(tests):
+    """ Обновление версий, кешей и поиска после пакетного создания тестов """
+    lesson_ids = {test.lesson_id for test in tests} - {None}
+    if lesson_ids:
+        touch(Lesson, pk__in=lesson_ids)
+        touch_sections(lessons__in=lesson_ids)
+    for test in tests:
+        index_object(test)
+
+
+@receiver(post_save, sender=Question)
+def question_saved(sender, instance, **kwargs):
+    test_content_changed(instance.test_id)
+
+
+@receiver(post_delete, sender=Question)
+def question_deleted(sender, instance, origin=None, **kwargs):
+    if not content_signals_suppressed.get() and not is_cascade(sender, origin):
+        test_content_changed(instance.test_id)
+
+
+def answer_changed(question_id):
+    bump_test_version(questions=question_id)
+    touch(Lesson, tests__questions=question_id)
+    touch_sections(lessons__tests__questions=question_id)
+
+
+@receiver(post_save, sender=Answer)
+def answer_saved(sender, instance, **kwargs):
+    answer_changed(instance.question_id)
+
+
+@receiver(post_delete, sender=Answer)
+def answer_deleted(sender, instance, origin=None, **kwargs):
+    if not content_signals_suppressed.get() and not is_cascade(sender, origin):
+        answer_changed(instance.question_id)
+
+
+@receiver(post_save, sender=Section)
+@receiver(post_save, sender=Lesson)
+@receiver(post_save, sender=Test)
+def catalog_object_saved(sender, instance, **kwargs):
+    index_object(instance)
+
+
+@receiver(post_delete, sender=Section)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_delete, sender=Test)
+def catalog_object_deleted(sender, instance, **kwargs):
+    remove_object(instance)
@@ -0,0 +1,170 @@
+import hashlib
+import os
+import re
+import tempfile
+from functools import partial
+
+from django.apps import apps
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+
+DIGEST_RE = re.compile(r"(?:^|/)([0-9a-f]{64})(?:\.[^/]*)?$")
+
+CHUNK_SIZE = 64 * 1024
+
+
+def stored_files():
+    return apps.get_model("education", "StoredFile").objects
+
+
+def name_digest(name):
+    """ SHA-256 из имени файла в адресуемом по содержимому хранилище """
+    match = DIGEST_RE.search(name or "")
+    return match.group(1) if match else None
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """ Файловое хранилище с именами по SHA-256 содержимого
+
+    Одинаковые файлы сохраняются один раз: хеш считается во время записи
+    во временный файл, и если файл с таким хешем уже есть, временный
+    удаляется. Имя сохраняет каталог upload_to и расширение исходного
+    файла: documents/ab/<sha256>.pdf.
+    """
+
+    def digest_name(self, name, digest):
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(directory, digest[:2], f"{digest}{extension}")
+
+    def _save(self, name, content):
+        temporary = not hasattr(content, "temporary_file_path")
+        if temporary:
+            source, digest, size = self.write_temporary(content)
+        else:
+            source = content.temporary_file_path()
+            digest = getattr(content, "digest", None) or file_digest(source)
+            size = os.path.getsize(source)
+        name = self.digest_name(name, digest)
+
+        # Ссылка берётся под блокировкой строки до проверки файла: release_file
+        # не удалит файл между проверкой и ссылкой. Если сохранение модели не
+        # удалось, ссылка откатывается вместе с транзакцией (StoredFilesMixin)
+        with transaction.atomic():
+            locked = stored_files().select_for_update()
+            stored, created = locked.get_or_create(
+                name=name, defaults={"digest": digest, "size": size, "references": 1}
+            )
+            if not created:
+                stored.references = F("references") + 1
+                stored.save(update_fields=["references"])
+            if not self.exists(name):
+                os.makedirs(os.path.dirname(self.path(name)), exist_ok=True)
+                file_move_safe(source, self.path(name), allow_overwrite=True)
+            elif temporary:
+                os.remove(source)
+
+        if self.file_permissions_mode is not None:
+            os.chmod(self.path(name), self.file_permissions_mode)
+        return name
+
+    def delete(self, name):
+        """ Удаление файла и его строки, если на файл не осталось ссылок
+
+        Файл удаляется под блокировкой строки: параллельный _save либо
+        успевает взять ссылку раньше, либо ждёт и записывает файл заново.
+        """
+        with transaction.atomic():
+            stored = stored_files().select_for_update().filter(name=name).first()
+            if stored is not None:
+                if stored.references > 0:
+                    return
+                stored.delete()
+            super().delete(name)
+
+    def write_temporary(self, content):
+        """ Запись содержимого во временный файл с подсчётом хеша """
+        temporary_dir = os.path.join(self.location, "tmp")
+        os.makedirs(temporary_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        with tempfile.NamedTemporaryFile(dir=temporary_dir, delete=False) as file:
+            for chunk in content.chunks(CHUNK_SIZE):
+                digest.update(chunk)
+                size += len(chunk)
+                file.write(chunk)
+        return file.name, digest.hexdigest(), size
+
+
+content_storage = ContentAddressedStorage()
+
+
+def acquire_file(name):
+    """ Увеличение числа ссылок на сохранённый файл """
+    if name:
+        stored_files().filter(name=name).update(references=F("references") + 1)
+
+
+def release_file(name, storage=content_storage):
+    """ Уменьшение числа ссылок и удаление файла, на который больше нет ссылок
+
+    Строка с нулём ссылок остаётся до удаления файла после коммита, чтобы
+    storage.delete проверил её под блокировкой.
+    """
+    if not name:
+        return
+    with transaction.atomic():
+        stored = stored_files().select_for_update().filter(name=name).first()
+        if stored is None:
+            return
+        if stored.references > 1:
+            stored.references = F("references") - 1
+            stored.save(update_fields=["references"])
+            return
+        stored.references = 0
+        stored.save(update_fields=["references"])
+    transaction.on_commit(partial(storage.delete, name))
+
+
+def is_new_file(field_file, update_fields=None):
+    """ Файл поля будет записан хранилищем при сохранении модели """
+    if update_fields is not None and field_file.field.name not in update_fields:
+        return False
+    return bool(field_file) and not field_file._committed
+
+
+def file_replaced(previous, current, stored=False):
+    """ Перенос ссылки при замене файла в поле модели
+
+    stored — файл только что записан хранилищем, и ссылку на него уже взял
+    _save.
+    """
+    if stored:
+        release_file(previous)
+    elif previous != current:
+        acquire_file(current)
+        release_file(previous)
+
+
+class StoredFilesMixin:
+    """ Сохранение модели с файлами хранилища в одной транзакции
+
+    Ссылку на новый файл берёт хранилище при записи, и если сохранение
+    строки не удалось, она откатывается вместе с транзакцией.
+    """
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
@@ -0,0 +1,50 @@
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+
+STREAM_CONTENT_TYPES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def iter_serialized(serializer, queryset, chunk_size):
+    """ Сериализация выборки по частям без загрузки её целиком в память """
+    renderer = JSONRenderer()
+    for instance in queryset.iterator(chunk_size=chunk_size):
+        yield renderer.render(serializer.to_representation(instance))
+
+
+def iter_json_array(items):
+    yield b"["
+    for index, item in enumerate(items):
+        yield item if index == 0 else b"," + item
+    yield b"]"
+
+
+def iter_ndjson(items):
+    for item in items:
+        yield item + b"\n"
+
+
+def stream_response(serializer, queryset, stream_format, chunk_size=500):
+    """ Потоковый ответ в формате JSON-массива или NDJSON """
+    items = iter_serialized(serializer, queryset, chunk_size)
+    if stream_format == "ndjson":
+        content = iter_ndjson(items)
+    else:
+        content = iter_json_array(items)
+    return StreamingHttpResponse(
+        content, content_type=STREAM_CONTENT_TYPES[stream_format]
+    )
+
+
+def iter_import_reports(reports):
+    """ Отчёты импорта по записям в NDJSON и итоговая строка """
+    totals = {"created": 0, "error": 0}
+    for report in reports:
+        totals[report["status"]] += 1
+        yield json.dumps(report, ensure_ascii=False).encode() + b"\n"
+    summary = {"created": totals["created"], "failed": totals["error"]}
+    yield json.dumps(summary).encode() + b"\n"
@@ -0,0 +1,125 @@
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from education.models import Submission
+from education.services import GradingError, build_result, grade_answers
+
+
+def worker_name():
+    """ Уникальное имя обработчика очереди """
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def enqueue_submission(test, user, answers_data):
+    """ Постановка ответов пользователя в очередь на проверку """
+    return Submission.objects.create(user=user, test=test, payload=answers_data)
+
+
+def requeue_stale(timeout):
+    """ Возврат в очередь отправок, зависших у упавших обработчиков """
+    return Submission.objects.filter(
+        status=Submission.PROCESSING,
+        claimed_at__lt=timezone.now() - timedelta(seconds=timeout),
+    ).update(status=Submission.PENDING, worker="")
+
+
+def claim_batch(worker, batch_size):
+    """ Захват пачки отправок из очереди обработчиком """
+    ids = list(
+        Submission.objects.filter(status=Submission.PENDING)
+        .order_by("id")
+        .values_list("id", flat=True)[:batch_size]
+    )
+    if not ids:
+        return []
+
+    Submission.objects.filter(id__in=ids, status=Submission.PENDING).update(
+        status=Submission.PROCESSING, worker=worker, claimed_at=timezone.now()
+    )
+    return list(
+        Submission.objects.filter(
+            id__in=ids, status=Submission.PROCESSING, worker=worker
+        )
+        .select_related("test", "user")
+        .order_by("id")
+    )
+
+
+def process_submission(submission):
+    """ Проверка одной отправки из очереди
+
+    Любая ошибка проверки помечает отправку как FAILED, чтобы она не
+    осталась в PROCESSING и не роняла обработчик при каждом запуске.
+    """
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                attempt = grade_answers(
+                    submission.test,
+                    submission.user,
+                    submission.payload,
+                    submitted_at=submission.created_at,
+                )
+        except GradingError as e:
+            submission.status = Submission.FAILED
+            submission.error = str(e)
+        except Exception as e:
+            submission.status = Submission.FAILED
+            submission.error = f"{type(e).__name__}: {e}"
+        else:
+            submission.status = Submission.DONE
+            submission.attempt = attempt
+            submission.result = build_result(attempt)
+
+        submission.processed_at = timezone.now()
+        submission.save(
+            update_fields=["status", "error", "result", "attempt", "processed_at"]
+        )
+
+
+def drain_queue(batch_size, worker=None):
+    """ Обработка очереди пачками до её опустошения """
+    worker = worker or worker_name()
+    processed = 0
+    while True:
+        batch = claim_batch(worker, batch_size)
+        if not batch:
+            return processed
+        for submission in batch:
+            process_submission(submission)
+        processed += len(batch)
+
+
+def run_worker(batch_size, poll_interval, stop_event, once=False, stale_timeout=None):
+    """ Цикл обработчика очереди
+
+    Зависшие отправки возвращаются в очередь раз в stale_timeout секунд.
+    Если обработчик падает, stop_event останавливает остальные.
+    """
+    worker = worker_name()
+    processed = 0
+    next_requeue = time.monotonic() + (stale_timeout or 0)
+    try:
+        while not stop_event.is_set():
+            close_old_connections()
+            if stale_timeout and time.monotonic() >= next_requeue:
+                requeue_stale(stale_timeout)
+                next_requeue = time.monotonic() + stale_timeout
+            drained = drain_queue(batch_size, worker)
+            processed += drained
+            if once:
+                break
+            if not drained:
+                stop_event.wait(poll_interval)
+    except BaseException:
+        stop_event.set()
+        raise
+    finally:
+        close_old_connections()
+    return processed
@@ -1,12 +1,66 @@
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.contrib.auth.models import Group
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.db.models import F
+from asgiref.sync import iscoroutinefunction
+from django.test import LiveServerTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework import status
-from rest_framework.test import APITestCase
-
-from education.models import Section, Lesson, Test, UserAnswer, Question, Answer
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from education.answer_keys import AnswerKey, AnswerKeyCache, answer_key_cache
+from education.async_views import (
+    AsyncLessonRetrieveAPIView,
+    AsyncSectionListApiView,
+    AsyncTestRetrieveApiView,
+)
+from education.importers import import_tests, read_yaml
+from education.models import (
+    Section,
+    Lesson,
+    Test,
+    UserAnswer,
+    Question,
+    Answer,
+    Submission,
+    TestAttempt,
+    SectionTree,
+    SearchDocument,
+    StoredFile,
+    MaterialText,
+    MaterialUpload,
+)
+from education.response_cache import HITS_KEY, cache_stats, get_cache
+from education.serializers import TestGetSerializer
+from education.services import bulk_create_questions
+from education.storage import content_storage
+from education.uploads import (
+    UploadOffsetError,
+    finalize_upload,
+    part_path,
+    start_upload,
+    write_chunk,
+)
 from users.models import User
+from users.tokens import RoleRefreshToken
 
 
 class SectionTest(APITestCase):
     def setUp(self):
+        get_cache().clear()
         self.user = User.objects.create(email="admin@lms.ru")
         self.client.force_authenticate(self.user)
         self.section = Section.objects.create(
@@ -59,6 +113,173 @@ class SectionTest(APITestCase):
             },
         )
 
+    def test_list_section_constant_queries(self):
+        """Тестирование постоянного числа запросов в списке разделов"""
+
+        def fetch(sections_count, lessons_count):
+            with self.captureOnCommitCallbacks(execute=True):
+                Section.objects.all().delete()
+                for number in range(sections_count):
+                    section = Section.objects.create(
+                        title=f"Раздел {number}", description="Test", owner=self.user
+                    )
+                    Lesson.objects.bulk_create(
+                        Lesson(title=f"Урок {i}", description="Test", section=section)
+                        for i in range(lessons_count)
+                    )
+
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get("/sections/?page_size=100")
+                detail = self.client.get(f"/section/{section.id}/")
+
+            results = response.json()["results"]
+            self.assertEqual(len(results), sections_count)
+            self.assertEqual(results[0]["number_of_lessons"], lessons_count)
+            self.assertEqual(len(results[0]["lessons"]), lessons_count)
+            self.assertEqual(detail.json()["number_of_lessons"], lessons_count)
+            return len(queries)
+
+        self.assertEqual(fetch(2, 1), fetch(20, 5))
+
+    def test_list_section_sparse_fields(self):
+        """Тестирование выборочных полей в списке разделов"""
+        Lesson.objects.create(
+            title="Test", description="Test", section=self.section, owner=self.user
+        )
+
+        with CaptureQueriesContext(connection) as full_queries:
+            self.client.get("/sections/")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/sections/?fields=id,title")
+
+        self.assertEqual(
+            response.json()["results"],
+            [{"id": self.section.id, "title": "Test Section"}],
+        )
+        self.assertLess(len(queries), len(full_queries))
+
+    def test_get_section_expand_tests(self):
+        """Тестирование раскрытия тестов уроков раздела"""
+        lesson = Lesson.objects.create(
+            title="Test", description="Test", section=self.section, owner=self.user
+        )
+        test = Test.objects.create(title="Test", lesson=lesson, owner=self.user)
+        Question.objects.create(test=test, number=1, question="2 + 2?")
+
+        response = self.client.get(f"/section/{self.section.id}/")
+        self.assertNotIn("tests", response.json()["lessons"][0])
+
+        response = self.client.get(
+            f"/section/{self.section.id}/?expand=lessons.tests"
+            "&fields=id,lessons.title,lessons.tests"
+        )
+        self.assertEqual(
+            response.json(),
+            {
+                "id": self.section.id,
+                "lessons": [
+                    {
+                        "title": "Test",
+                        "tests": [
+                            {
+                                "id": test.id,
+                                "title": "Test",
+                                "description": "",
+                                "lesson": lesson.id,
+                                "questions": [
+                                    {"number": 1, "question": "2 + 2?", "answers": []}
+                                ],
+                                "owner": self.user.id,
+                            }
+                        ],
+                    }
+                ],
+            },
+        )
+
+    def test_list_section_cursor_pagination(self):
+        """Тестирование пагинации разделов по курсору"""
+        for number in range(24):
+            Section.objects.create(
+                title=f"Раздел {number % 5}", description="Test", owner=self.user
+            )
+
+        response = self.client.get("/sections/?pagination=cursor&count=true")
+        self.assertEqual(response.json()["count"], 25)
+
+        titles = []
+        url = "/sections/?pagination=cursor&page_size=10"
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            for query in queries.captured_queries:
+                self.assertNotIn("COUNT(*)", query["sql"])
+            self.assertNotIn("count", response.json())
+            titles += [(s["title"], s["id"]) for s in response.json()["results"]]
+            url = response.json()["next"]
+
+        self.assertEqual(
+            titles,
+            list(Section.objects.order_by("title", "id").values_list("title", "id")),
+        )
+
+        for position in ("broken", ["a", "b"], ["a", None], [["a"], 1]):
+            cursor = base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+            if position == "broken":
+                cursor = position
+            response = self.client.get(f"/sections/?cursor={cursor}")
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_get_section_course_tree(self):
+        """Тестирование выдачи раздела из предрассчитанного дерева курса"""
+        lesson = Lesson.objects.create(
+            title="Test", description="Test", section=self.section, owner=self.user
+        )
+        material_lesson = Lesson.objects.create(
+            title="Material",
+            description="Test",
+            section=self.section,
+            material="documents/notes.pdf",
+        )
+        test = Test.objects.create(title="Test", lesson=lesson, owner=self.user)
+        question = Question.objects.create(test=test, number=1, question="2 + 2?")
+        url = f"/section/{self.section.id}/?expand=lessons,lessons.tests"
+
+        call_command("rebuild_course_trees", stdout=StringIO())
+        tree = SectionTree.objects.get(section=self.section)
+        lessons = {item["id"]: item for item in tree.document["lessons"]}
+        self.assertEqual(lessons[lesson.id]["tests"][0]["id"], test.id)
+
+        response = self.client.get(url)
+        lessons = {item["id"]: item for item in response.json()["lessons"]}
+        self.assertEqual(lessons[lesson.id]["tests"][0]["id"], test.id)
+        material = lessons[material_lesson.id]["material"]
+        self.assertEqual(material, "http://testserver/media/documents/notes.pdf")
+        direct = self.client.get(f"{url}&fields=lessons")
+        self.assertIn(material, [item["material"] for item in direct.json()["lessons"]])
+
+        Answer.objects.create(question=question, number=1, answer="4")
+
+        response = self.client.get(url)
+        lessons = {item["id"]: item for item in response.json()["lessons"]}
+        answers = lessons[lesson.id]["tests"][0]["questions"][0]["answers"]
+        self.assertEqual(answers, [{"number": 1, "answer": "4"}])
+        tree.refresh_from_db()
+        self.assertEqual(tree.version, Section.objects.get(pk=self.section.id).version)
+
+    def test_course_tree_rebuilt_on_commit(self):
+        """Тестирование пересборки дерева курса после изменения урока"""
+        call_command("rebuild_course_trees", stdout=StringIO())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Lesson.objects.create(title="New", description="Test", section=self.section)
+
+        tree = SectionTree.objects.get(section=self.section)
+        self.assertEqual(
+            [lesson["title"] for lesson in tree.document["lessons"]], ["New"]
+        )
+
     def test_update_section(self):
         """Тестированрие для обновления раздела"""
         section = Section.objects.create(
@@ -100,6 +321,237 @@ class SectionTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
 
 
+class CatalogCacheTest(APITestCase):
+    def setUp(self):
+        get_cache().clear()
+        cache_stats.clear()
+        self.user = User.objects.create(email="admin@lms.ru")
+        self.client.force_authenticate(self.user)
+        self.section = Section.objects.create(
+            title="Test Section", description="Test Description", owner=self.user
+        )
+        self.lesson = Lesson.objects.create(
+            title="Test", description="Test", section=self.section, owner=self.user
+        )
+
+    def test_list_sections_cached(self):
+        """Тестирование кеширования и сброса списка разделов"""
+        response = self.client.get("/sections/")
+        self.assertEqual(response["X-Cache"], "MISS")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/sections/")
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(response.json()["results"][0]["number_of_lessons"], 1)
+
+        self.assertEqual(self.client.get("/lessons/")["X-Cache"], "MISS")
+        with self.captureOnCommitCallbacks(execute=True):
+            Section.objects.create(title="Other", description="Test")
+        self.assertEqual(self.client.get("/lessons/")["X-Cache"], "HIT")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Lesson.objects.create(title="New", description="Test", section=self.section)
+        response = self.client.get("/sections/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["results"][1]["number_of_lessons"], 2)
+
+    def test_get_section_invalidated_by_answer(self):
+        """Тестирование сброса кеша раздела при изменении ответа"""
+        test = Test.objects.create(title="Test", lesson=self.lesson)
+        question = Question.objects.create(test=test, number=1, question="2 + 2?")
+        url = f"/section/{self.section.id}/?expand=lessons.tests"
+
+        self.client.get(url)
+        self.assertEqual(self.client.get(url)["X-Cache"], "HIT")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Answer.objects.create(question=question, number=1, answer="4")
+
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        answers = response.json()["lessons"][0]["tests"][0]["questions"][0]["answers"]
+        self.assertEqual(answers, [{"number": 1, "answer": "4"}])
+
+    def test_invalidated_after_commit(self):
+        """Тестирование сброса кеша только после коммита изменений"""
+        self.client.get("/sections/")
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            Section.objects.create(title="Other", description="Test")
+            self.assertEqual(self.client.get("/sections/")["X-Cache"], "HIT")
+        for callback in callbacks:
+            callback()
+
+        response = self.client.get("/sections/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["count"], 2)
+
+    def test_get_section_cache_follows_version(self):
+        """Тестирование ключа кеша раздела по версии, совпадающей с ETag"""
+        url = f"/section/{self.section.id}/"
+        self.client.get(url)
+        self.assertEqual(self.client.get(url)["X-Cache"], "HIT")
+
+        # Версия изменилась, а сброс поколения ещё не выполнен
+        Section.objects.filter(pk=self.section.pk).update(
+            title="New", version=F("version") + 1
+        )
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["title"], "New")
+        self.section.refresh_from_db()
+        self.assertEqual(response["ETag"], f'"{self.section.version}"')
+
+    def test_cache_stats(self):
+        """Тестирование счётчиков попаданий в кеш"""
+        self.client.get("/sections/")
+        self.client.get("/sections/")
+        self.client.get("/sections/")
+        # Счётчики копятся в памяти процесса, а не пишутся в кеш на каждом запросе
+        self.assertIsNone(get_cache().get(HITS_KEY))
+
+        response = self.client.get("/catalog/cache-stats/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get("/catalog/cache-stats/")
+        self.assertEqual(response.json(), {"hits": 2, "misses": 1, "hit_rate": 0.6667})
+
+
+class SearchTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(email="admin@lms.ru")
+        self.client.force_authenticate(self.user)
+        self.section = Section.objects.create(
+            title="История Рима", description="Древний мир", owner=self.user
+        )
+        self.lesson = Lesson.objects.create(
+            title="Урок 1", description="Основание Рима", section=self.section
+        )
+        self.test = Test.objects.create(title="Математика", lesson=self.lesson)
+
+    def test_search(self):
+        """Тестирование поиска с ранжированием"""
+        response = self.client.get("/search/?q=рима")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(r["type"], r["id"]) for r in response.json()["results"]],
+            [("section", self.section.id), ("lesson", self.lesson.id)],
+        )
+
+        response = self.client.get("/search/?q=история рима")
+        self.assertEqual(response.json()["results"][0]["id"], self.section.id)
+
+        response = self.client.get("/search/")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_index_updates(self):
+        """Тестирование инкрементального обновления поискового индекса"""
+        self.test.title = "Геометрия"
+        self.test.save()
+
+        response = self.client.get("/search/?q=геометрия")
+        self.assertEqual(response.json()["results"][0]["id"], self.test.id)
+        self.assertEqual(self.client.get("/search/?q=математика").json()["results"], [])
+
+        self.section.delete()
+        self.assertEqual(self.client.get("/search/?q=рима").json()["results"], [])
+        self.assertFalse(SearchDocument.objects.exists())
+
+    def test_search_material_text(self):
+        """Тестирование поиска по тексту материалов уроков"""
+        document = BytesIO()
+        with zipfile.ZipFile(document, "w") as archive:
+            archive.writestr(
+                "word/document.xml",
+                '<w:document xmlns:w="http://schemas.openxmlformats.org/'
+                'wordprocessingml/2006/main"><w:body><w:p><w:r>'
+                "<w:t>Легионы</w:t></w:r></w:p></w:body></w:document>",
+            )
+        book = BytesIO()
+        with zipfile.ZipFile(book, "w") as archive:
+            archive.writestr(
+                "xl/sharedStrings.xml",
+                '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/'
+                '2006/main"><si><t>Сенат</t></si></sst>',
+            )
+            archive.writestr(
+                "xl/worksheets/sheet1.xml",
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/'
+                '2006/main"><sheetData><row><c t="s"><v>0</v></c><c><v>753</v></c>'
+                "</row></sheetData></worksheet>",
+            )
+        materials = {
+            "plan.txt": "Консулы\nи  трибуны".encode(),
+            "plan.docx": document.getvalue(),
+            "plan.xlsx": book.getvalue(),
+            "plan.pdf": b"%PDF-1.4",
+        }
+
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(
+                MEDIA_ROOT=media_root,
+                MATERIAL_PDF_EXTRACTOR="education.tests.pdf_text",
+            ):
+                lessons = {
+                    name: Lesson.objects.create(
+                        title=name,
+                        description="Материал",
+                        section=self.section,
+                        material=SimpleUploadedFile(name, content),
+                    )
+                    for name, content in materials.items()
+                }
+                out = StringIO()
+                call_command(
+                    "extract_materials", "--once", "--workers", "1", stdout=out
+                )
+                self.assertIn("Extracted text of 4 materials", out.getvalue())
+
+                texts = dict(MaterialText.objects.values_list("lesson__title", "text"))
+                self.assertEqual(
+                    texts,
+                    {
+                        "plan.txt": "Консулы и трибуны",
+                        "plan.docx": "Легионы",
+                        "plan.xlsx": "Сенат 753",
+                        "plan.pdf": "Форум",
+                    },
+                )
+                for word, name in [
+                    ("трибуны", "plan.txt"),
+                    ("легионы", "plan.docx"),
+                    ("сенат", "plan.xlsx"),
+                    ("форум", "plan.pdf"),
+                ]:
+                    response = self.client.get(f"/search/?q={word}")
+                    self.assertEqual(
+                        response.json()["results"][0]["id"], lessons[name].id
+                    )
+
+                out = StringIO()
+                call_command(
+                    "extract_materials", "--once", "--workers", "1", stdout=out
+                )
+                self.assertIn("Extracted text of 0 materials", out.getvalue())
+
+                lesson = lessons["plan.txt"]
+                lesson.material = None
+                lesson.save()
+                call_command("extract_materials", "--once", stdout=StringIO())
+                self.assertFalse(MaterialText.objects.filter(lesson=lesson).exists())
+                self.assertEqual(
+                    self.client.get("/search/?q=трибуны").json()["results"], []
+                )
+
+
+def pdf_text(path):
+    return "Форум"
+
+
 class LessonTest(APITestCase):
     def setUp(self):
         self.user = User.objects.create(email="admin@lms.ru")
@@ -145,6 +597,31 @@ class LessonTest(APITestCase):
         self.assertEqual(result["section"], self.section.id)
         self.assertEqual(result["owner"], self.user.id)
 
+    def test_list_lessons_cursor_pagination(self):
+        """Тестирование пагинации уроков по курсору"""
+        other_section = Section.objects.create(title="Other", description="Test")
+        for number in range(7):
+            for section in (self.section, other_section):
+                Lesson.objects.create(
+                    title=f"Урок {number % 3}", description="Test", section=section
+                )
+
+        ids = []
+        url = "/lessons/?pagination=cursor&page_size=4"
+        while url:
+            response = self.client.get(url)
+            ids += [lesson["id"] for lesson in response.json()["results"]]
+            url = response.json()["next"]
+
+        self.assertEqual(
+            ids,
+            list(
+                Lesson.objects.order_by("title", "section_id", "id").values_list(
+                    "id", flat=True
+                )
+            ),
+        )
+
     def test_update_lesson(self):
         """Тестированрие для обновления урока"""
         lesson = Lesson.objects.create(
@@ -179,6 +656,291 @@ class LessonTest(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
 
+    def test_download_material(self):
+        """Тестирование выдачи материала урока по диапазонам"""
+        content = b"0123456789" * 100
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root):
+                lesson = Lesson.objects.create(
+                    title="Lecture",
+                    description="Lecture",
+                    section=self.section,
+                    material=SimpleUploadedFile("lecture.txt", content),
+                )
+                url = f"/lesson/{lesson.id}/material/"
+
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(b"".join(response.streaming_content), content)
+                self.assertEqual(response["Accept-Ranges"], "bytes")
+                self.assertIn("max-age=", response["Cache-Control"])
+                etag = response["ETag"]
+
+                response = self.client.get(url, HTTP_RANGE="bytes=990-")
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response["Content-Range"], "bytes 990-999/1000")
+                self.assertEqual(b"".join(response.streaming_content), content[990:])
+
+                response = self.client.get(url, HTTP_RANGE="bytes=5-14")
+                self.assertEqual(response["Content-Length"], "10")
+                self.assertEqual(b"".join(response.streaming_content), b"5678901234")
+
+                response = self.client.get(url, HTTP_RANGE="bytes=-3")
+                self.assertEqual(b"".join(response.streaming_content), b"789")
+
+                response = self.client.get(
+                    url, HTTP_RANGE="bytes=0-1", HTTP_IF_RANGE='"stale"'
+                )
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                response.close()
+
+                response = self.client.get(url, HTTP_RANGE="bytes=2000-")
+                self.assertEqual(response.status_code, 416)
+
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+                with override_settings(MATERIAL_ACCEL_REDIRECT_PREFIX="/protected/"):
+                    response = self.client.get(url)
+                self.assertEqual(
+                    response["X-Accel-Redirect"], f"/protected/{lesson.material.name}"
+                )
+                self.assertEqual(response.content, b"")
+
+                os.remove(lesson.material.path)
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+                lesson.material = None
+                lesson.save()
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_chunked_material_upload(self):
+        """Тестирование загрузки материала по частям с возобновлением"""
+        lesson = Lesson.objects.create(
+            title="Lecture",
+            description="Lecture",
+            section=self.section,
+            owner=self.user,
+        )
+        content = b"lecture notes " * 1000
+        digest = hashlib.sha256(content).hexdigest()
+        url = f"/lesson/{lesson.id}/material/uploads/"
+
+        response = self.client.post(
+            url, {"filename": "notes.exe", "size": len(content)}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root):
+                response = self.client.post(
+                    url,
+                    {
+                        "filename": "notes.txt",
+                        "size": len(content),
+                        "checksum": digest,
+                    },
+                    format="json",
+                )
+                self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+                upload_url = f"/material/upload/{response.json()['id']}/"
+
+                def put(offset, chunk):
+                    return self.client.put(
+                        upload_url,
+                        chunk,
+                        content_type="application/octet-stream",
+                        HTTP_UPLOAD_OFFSET=str(offset),
+                    )
+
+                self.assertEqual(put(0, content[:5000]).json()["offset"], 5000)
+
+                response = put(0, content[:5000])
+                self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+                self.assertEqual(response.json()["offset"], 5000)
+
+                response = self.client.post(f"{upload_url}finalize/")
+                self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+                self.assertEqual(self.client.get(upload_url).json()["offset"], 5000)
+                self.assertEqual(
+                    put(5000, content[5000:]).json()["offset"], len(content)
+                )
+
+                response = self.client.post(f"{upload_url}finalize/")
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.json()["status"], "complete")
+
+                lesson.refresh_from_db()
+                self.assertEqual(
+                    lesson.material.name,
+                    f"documents/{digest[:2]}/{digest}.txt",
+                )
+                with lesson.material.open("rb") as material:
+                    self.assertEqual(material.read(), content)
+                self.assertEqual(os.listdir(os.path.join(media_root, "uploads")), [])
+
+                response = self.client.post(
+                    url,
+                    {"filename": "other.txt", "size": 3, "checksum": "0" * 64},
+                    format="json",
+                )
+                upload_url = f"/material/upload/{response.json()['id']}/"
+                put(0, b"abc")
+                response = self.client.post(f"{upload_url}finalize/")
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+                response = self.client.delete(upload_url)
+                self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+                self.assertEqual(os.listdir(os.path.join(media_root, "uploads")), [])
+
+    def test_material_upload_offset_race(self):
+        """Тестирование условного сдвига смещения при параллельной части"""
+        lesson = Lesson.objects.create(
+            title="Lecture", description="Lecture", section=self.section
+        )
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root):
+                upload = start_upload(lesson, self.user, "notes.txt", 6)
+
+                class RacingStream(BytesIO):
+                    """Пока часть читается, смещение загрузки сдвигается"""
+
+                    def read(stream, size=-1):
+                        if stream.tell() == 0:
+                            MaterialUpload.objects.filter(id=upload.id).update(offset=3)
+                        return super().read(size)
+
+                with self.assertRaises(UploadOffsetError) as error:
+                    write_chunk(upload.id, self.user, 0, RacingStream(b"abc"), 3)
+                self.assertEqual(error.exception.offset, 3)
+
+                write_chunk(upload.id, self.user, 3, BytesIO(b"def"), 3)
+                with open(part_path(upload), "rb") as part:
+                    self.assertEqual(part.read(), b"abcdef")
+
+                # Хранилище берёт SHA-256, посчитанный при проверке, а не читает файл
+                digest = hashlib.sha256(b"abcdef").hexdigest()
+                with mock.patch("education.storage.file_digest") as file_digest:
+                    finalize_upload(upload.id, self.user, digest)
+                file_digest.assert_not_called()
+                lesson.refresh_from_db()
+                self.assertEqual(
+                    lesson.material.name, f"documents/{digest[:2]}/{digest}.txt"
+                )
+                self.assertEqual(os.listdir(os.path.join(media_root, "uploads")), [])
+
+    def test_purge_uploads(self):
+        """Тестирование удаления брошенных загрузок и их файлов"""
+        lesson = Lesson.objects.create(
+            title="Lecture", description="Lecture", section=self.section
+        )
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root):
+                stale = start_upload(lesson, self.user, "old.txt", 10)
+                fresh = start_upload(lesson, self.user, "new.txt", 10)
+                MaterialUpload.objects.filter(id=stale.id).update(
+                    updated_at=timezone.now() - timedelta(days=2)
+                )
+                orphan = os.path.join(media_root, "uploads", "orphan.part")
+                open(orphan, "wb").close()
+                os.utime(orphan, (0, 0))
+
+                out = StringIO()
+                call_command("purge_uploads", "--hours", "24", stdout=out)
+
+                self.assertIn("Purged 1 stale uploads, 1 files", out.getvalue())
+                self.assertEqual(
+                    list(MaterialUpload.objects.values_list("id", flat=True)),
+                    [fresh.id],
+                )
+                self.assertEqual(
+                    os.listdir(os.path.join(media_root, "uploads")),
+                    [f"{fresh.id}.part"],
+                )
+
+    def test_material_deduplication(self):
+        """Тестирование хранения одинаковых файлов одной копией"""
+        content = b"syllabus" * 100
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root, THUMBNAIL_WORKERS=0):
+                with self.captureOnCommitCallbacks(execute=True):
+                    lessons = [
+                        Lesson.objects.create(
+                            title=f"Lesson {number}",
+                            description="Lesson",
+                            section=self.section,
+                            material=SimpleUploadedFile("syllabus.PDF", content),
+                        )
+                        for number in range(3)
+                    ]
+                    self.user.avatar = SimpleUploadedFile("me.pdf", content)
+                    self.user.save()
+
+                name = lessons[0].material.name
+                digest = hashlib.sha256(content).hexdigest()
+                self.assertEqual(name, f"documents/{digest[:2]}/{digest}.pdf")
+                self.assertEqual({lesson.material.name for lesson in lessons}, {name})
+                self.assertEqual(StoredFile.objects.get(name=name).references, 3)
+                self.assertEqual(
+                    StoredFile.objects.get(name=self.user.avatar.name).references, 1
+                )
+
+                with self.captureOnCommitCallbacks(execute=True):
+                    lessons[0].delete()
+                    lessons[1].material = SimpleUploadedFile("other.pdf", b"other")
+                    lessons[1].save()
+                self.assertTrue(os.path.exists(lessons[2].material.path))
+                self.assertEqual(StoredFile.objects.get(name=name).references, 1)
+
+                response = self.client.get(f"/lesson/{lessons[2].id}/material/")
+                self.assertEqual(response["ETag"], f'"{digest}"')
+                response.close()
+
+                with self.captureOnCommitCallbacks(execute=True):
+                    lessons[2].material.delete()
+                self.assertFalse(StoredFile.objects.filter(name=name).exists())
+                self.assertFalse(os.path.exists(os.path.join(media_root, name)))
+
+                avatar = self.user.avatar.path
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.user.delete()
+                self.assertFalse(os.path.exists(avatar))
+
+    def test_material_reference_on_save(self):
+        """Тестирование ссылки на файл, взятой хранилищем при записи"""
+        content = b"handout" * 100
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root):
+                with self.captureOnCommitCallbacks(execute=True):
+                    lesson = Lesson.objects.create(
+                        title="Lesson",
+                        description="Lesson",
+                        section=self.section,
+                        material=SimpleUploadedFile("handout.pdf", content),
+                    )
+                name = lesson.material.name
+
+                with self.assertRaises(IntegrityError):
+                    Lesson.objects.create(
+                        title="Broken",
+                        description="Lesson",
+                        section=None,
+                        material=SimpleUploadedFile("handout.pdf", content),
+                    )
+                self.assertEqual(StoredFile.objects.get(name=name).references, 1)
+
+                with self.captureOnCommitCallbacks(execute=True):
+                    stored_name = content_storage.save(
+                        "documents/handout.pdf", ContentFile(content)
+                    )
+                    lesson.delete()
+                self.assertEqual(stored_name, name)
+                self.assertEqual(StoredFile.objects.get(name=name).references, 1)
+                self.assertTrue(os.path.exists(os.path.join(media_root, name)))
+
 
 class TestTest(APITestCase):
     def setUp(self):
@@ -256,11 +1018,125 @@ class TestTest(APITestCase):
 
         response_data = response.json()
 
-        self.assertTrue(len(response_data) > 0)
+        self.assertEqual(response_data["count"], 1)
 
-        result = response_data[0]
+        result = response_data["results"][0]
         self.assertEqual(result["id"], test_id)
         self.assertEqual(result["title"], "Тест по истории Древнего Рима")
+        self.assertEqual(len(result["questions"][0]["answers"]), 2)
+
+    def test_list_test_stream(self):
+        """Тестирование потоковой выгрузки списка тестов"""
+        for number in range(3):
+            test = Test.objects.create(title=f"Тест {number}", owner=self.user)
+            question = Question.objects.create(test=test, number=1, question="?")
+            Answer.objects.create(question=question, number=1, answer="Да")
+
+        response = self.client.get("/tests/?stream=ndjson")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line)["title"] for line in lines],
+            ["Тест 0", "Тест 1", "Тест 2"],
+        )
+
+        response = self.client.get("/tests/?stream=json&fields=id,title")
+        data = json.loads(b"".join(response.streaming_content))
+        self.assertEqual([set(test) for test in data], [{"id", "title"}] * 3)
+
+    def test_get_test_fast_path(self):
+        """Тестирование быстрой выдачи теста без сериализаторов"""
+        test = Test.objects.create(
+            title="Test", description="Test", lesson=self.lesson, owner=self.user
+        )
+        for number in (2, 1, 3):
+            question = Question.objects.create(
+                test=test, number=number, question=f"Вопрос {number}"
+            )
+            if number != 3:
+                Answer.objects.create(question=question, number=2, answer="Нет")
+                Answer.objects.create(
+                    question=question, number=1, answer="Да", is_correct=True
+                )
+
+        response = self.client.get(f"/test/{test.id}/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json(),
+            json.loads(json.dumps(TestGetSerializer(test).data)),
+        )
+        self.assertEqual(response.json()["questions"][2]["answers"], [])
+        self.assertEqual(
+            self.client.get("/test/0/").status_code, status.HTTP_404_NOT_FOUND
+        )
+
+    def test_get_test_conditional(self):
+        """Тестирование условного запроса теста по ETag"""
+        test = Test.objects.create(title="Test", lesson=self.lesson, owner=self.user)
+        question = Question.objects.create(test=test, number=1, question="2 + 2?")
+
+        response = self.client.get(f"/test/{test.id}/")
+        etag = response["ETag"]
+        self.assertIn("Last-Modified", response)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/test/{test.id}/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(len(queries), 1)
+
+        Answer.objects.create(question=question, number=1, answer="4")
+
+        response = self.client.get(f"/test/{test.id}/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_child_changes_bump_versions(self):
+        """Тестирование смены ETag раздела и урока при изменении теста"""
+        section_etag = self.client.get(f"/section/{self.section.id}/")["ETag"]
+        lesson_etag = self.client.get(f"/lesson/{self.lesson.id}/")["ETag"]
+
+        test = Test.objects.create(title="Test", lesson=self.lesson, owner=self.user)
+
+        self.assertNotEqual(
+            self.client.get(f"/section/{self.section.id}/")["ETag"], section_etag
+        )
+        self.assertNotEqual(
+            self.client.get(f"/lesson/{self.lesson.id}/")["ETag"], lesson_etag
+        )
+
+        section_etag = self.client.get(f"/section/{self.section.id}/")["ETag"]
+        test.delete()
+        response = self.client.get(
+            f"/section/{self.section.id}/", HTTP_IF_NONE_MATCH=section_etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_save_keeps_concurrent_version(self):
+        """Тестирование сохранения объекта без отката версии, увеличенной touch"""
+        lesson = Lesson.objects.get(pk=self.lesson.pk)
+        version = lesson.version
+        etag = self.client.get(f"/lesson/{lesson.id}/")["ETag"]
+
+        # Изменение теста урока между чтением и сохранением урока
+        Test.objects.create(title="Test", lesson=self.lesson, owner=self.user)
+        lesson.title = "New"
+        lesson.save()
+
+        lesson.refresh_from_db()
+        self.assertEqual(lesson.version, version + 2)
+        self.assertEqual(lesson.title, "New")
+        response = self.client.get(f"/lesson/{lesson.id}/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_bench_test_delivery(self):
+        """Тестирование бенчмарка выдачи теста"""
+        out = StringIO()
+        call_command("bench_test_delivery", "--sizes", "5", "--repeat", "1", stdout=out)
+
+        self.assertIn("5 questions", out.getvalue())
+        self.assertFalse(Test.objects.filter(title="Benchmark 5").exists())
 
     def test_update_test(self):
         """Тестированрие для обновления теста"""
@@ -301,6 +1177,280 @@ class TestTest(APITestCase):
         self.assertEqual(response_data["title"], "Test 1")
         self.assertEqual(response_data["description"], "Test 1")
 
+    def test_create_test_bulk(self):
+        """Тестирование создания теста с вопросами пачками"""
+
+        def build(count):
+            return {
+                "title": f"Test {count}",
+                "lesson": self.lesson.id,
+                "questions": [
+                    {
+                        "number": number,
+                        "question": f"Вопрос {number}",
+                        "answers": [
+                            {"number": 1, "answer": "Да", "is_correct": True},
+                            {"number": 2, "answer": "Нет"},
+                        ],
+                    }
+                    for number in range(1, count + 1)
+                ],
+            }
+
+        query_counts = []
+        for count in (2, 20):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(
+                    "/test/create/", data=build(count), format="json"
+                )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            query_counts.append(len(queries))
+
+        self.assertEqual(query_counts[0], query_counts[1])
+        test = Test.objects.get(title="Test 20")
+        self.assertEqual(test.questions.count(), 20)
+        self.assertEqual(Answer.objects.filter(question__test=test).count(), 40)
+
+        data = build(2)
+        data["questions"][1]["number"] = 1
+        response = self.client.post("/test/create/", data=data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_update_test_questions(self):
+        """Тестирование обновления вопросов теста по номерам"""
+        test = Test.objects.create(title="Test", lesson=self.lesson, owner=self.user)
+        kept = Question.objects.create(test=test, number=1, question="2 + 2?")
+        kept_answer = Answer.objects.create(
+            question=kept, number=1, answer="4", is_correct=True
+        )
+        wrong_answer = Answer.objects.create(question=kept, number=2, answer="5")
+        changed = Question.objects.create(test=test, number=2, question="3 * 3?")
+        removed = Question.objects.create(test=test, number=3, question="1 - 1?")
+        etag = self.client.get(f"/test/{test.id}/")["ETag"]
+
+        response = self.client.patch(
+            f"/test/update/{test.id}/",
+            data={
+                "questions": [
+                    {
+                        "number": 1,
+                        "question": "2 + 2?",
+                        "answers": [
+                            {"number": 1, "answer": "4", "is_correct": True},
+                            {"number": 3, "answer": "22"},
+                        ],
+                    },
+                    {"number": 2, "question": "3 * 3 = ?"},
+                    {
+                        "number": 4,
+                        "question": "10 / 2?",
+                        "answers": [{"number": 1, "answer": "5", "is_correct": True}],
+                    },
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(
+            list(test.questions.order_by("number").values_list("id", "number")),
+            [
+                (kept.id, 1),
+                (changed.id, 2),
+                (test.questions.get(number=4).id, 4),
+            ],
+        )
+        self.assertFalse(Question.objects.filter(id=removed.id).exists())
+        self.assertFalse(Answer.objects.filter(id=wrong_answer.id).exists())
+        self.assertEqual(
+            list(kept.answers.order_by("number").values_list("id", "number")),
+            [(kept_answer.id, 1), (kept.answers.get(number=3).id, 3)],
+        )
+        self.assertEqual(Question.objects.get(id=changed.id).question, "3 * 3 = ?")
+        self.assertNotEqual(self.client.get(f"/test/{test.id}/")["ETag"], etag)
+
+        def remove_questions(count):
+            for number in range(5, 5 + count):
+                question = Question.objects.create(
+                    test=test, number=number, question="?"
+                )
+                Answer.objects.create(question=question, number=1, answer="1")
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.patch(
+                    f"/test/update/{test.id}/",
+                    data={"questions": [{"number": 1, "question": "2 + 2?"}]},
+                    format="json",
+                )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(list(test.questions.values_list("number")), [(1,)])
+            return len(queries)
+
+        self.assertEqual(remove_questions(1), remove_questions(39))
+
+    def test_import_tests_command(self):
+        """Тестирование импорта тестов из JSON Lines"""
+        other = User.objects.create(email="other@lms.ru")
+        # Записи в формате выгрузки тестов: с id и владельцем
+        records = [
+            {
+                "id": 1000 + number,
+                "owner": other.id,
+                "title": f"Импорт {number}",
+                "lesson": self.lesson.id,
+                "questions": [
+                    {
+                        "number": 1,
+                        "question": "2 + 2?",
+                        "answers": [{"number": 1, "answer": "4", "is_correct": True}],
+                    }
+                ],
+            }
+            for number in range(5)
+        ]
+        lines = [json.dumps(record) for record in records]
+        lines.insert(2, "{broken")
+        lines.append(json.dumps({"description": "Без заголовка"}))
+
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as f:
+            f.write("\n".join(lines))
+
+        out, err = StringIO(), StringIO()
+        call_command(
+            "import_tests",
+            f.name,
+            "--owner",
+            self.user.email,
+            "--batch-size",
+            "2",
+            stdout=out,
+            stderr=err,
+        )
+
+        self.assertIn("Imported 5 tests, 2 failed", out.getvalue())
+        self.assertIn("#3:", err.getvalue())
+        self.assertIn("#7:", err.getvalue())
+        tests = Test.objects.filter(title__startswith="Импорт")
+        self.assertEqual(tests.count(), 5)
+        self.assertEqual(set(tests.values_list("owner", flat=True)), {self.user.id})
+        self.assertEqual(
+            Answer.objects.filter(question__test__in=tests, is_correct=True).count(),
+            5,
+        )
+        self.assertTrue(
+            SearchDocument.objects.filter(
+                kind=SearchDocument.TEST, object_id=tests[0].id
+            ).exists()
+        )
+
+    def test_read_yaml_list_streaming(self):
+        """Тестирование чтения списка тестов YAML по одному элементу"""
+        records = read_yaml(StringIO("- title: A\n- title: B\n- [broken\n"))
+
+        self.assertEqual(next(records), (1, {"title": "A"}, None))
+        self.assertEqual(next(records), (2, {"title": "B"}, None))
+        position, data, error = next(records)
+        self.assertIsNone(data)
+        self.assertIn("Некорректный YAML", error)
+
+    def test_import_tests_record_failure(self):
+        """Тестирование отчёта о непредвиденной ошибке одной записи пачки"""
+
+        def failing_bulk_create(tests_questions):
+            tests_questions = list(tests_questions)
+            if any(test.title == "Сбой" for test, _ in tests_questions):
+                raise ValueError("сбой записи")
+            bulk_create_questions(tests_questions)
+
+        stream = StringIO(
+            "\n".join(
+                json.dumps({"title": title}) for title in ("Первый", "Сбой", "Третий")
+            )
+        )
+        with mock.patch(
+            "education.importers.bulk_create_questions", failing_bulk_create
+        ):
+            reports = list(import_tests(stream, "jsonl", self.user, batch_size=3))
+
+        self.assertEqual(
+            [(report["record"], report["status"]) for report in reports],
+            [(1, "created"), (2, "error"), (3, "created")],
+        )
+        self.assertEqual(reports[1]["errors"], "ValueError: сбой записи")
+        self.assertEqual(
+            set(Test.objects.values_list("title", flat=True)), {"Первый", "Третий"}
+        )
+
+    def test_import_tests_upload(self):
+        """Тестирование загрузки тестов файлами YAML и CSV"""
+        url = "/tests/import/"
+        upload = SimpleUploadedFile("tests.yaml", b"title: YAML\n")
+        response = self.client.post(url, {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.groups.add(Group.objects.create(name="Teachers"))
+
+        yaml_content = (
+            "title: YAML 1\n"
+            "questions:\n"
+            "  - number: 1\n"
+            "    question: Столица Италии?\n"
+            "    answers:\n"
+            "      - {number: 1, answer: Рим, is_correct: true}\n"
+            "---\n"
+            "- title: YAML 2\n"
+            "- questions: []\n"
+        )
+        upload = SimpleUploadedFile("tests.yaml", yaml_content.encode())
+        response = self.client.post(url, {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        reports = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ]
+        self.assertEqual(
+            {report["record"]: report["status"] for report in reports[:-1]},
+            {1: "created", 2: "created", 3: "error"},
+        )
+        self.assertEqual(reports[-1], {"created": 2, "failed": 1})
+        self.assertEqual(
+            Test.objects.get(title="YAML 1").questions.get().answers.get().answer, "Рим"
+        )
+
+        csv_content = (
+            "test,title,description,lesson,question_number,question,"
+            "answer_number,answer,is_correct\n"
+            f"a,CSV,Описание,{self.lesson.id},1,2 + 2?,1,4,true\n"
+            f"a,CSV,Описание,{self.lesson.id},1,2 + 2?,2,5,false\n"
+            f"a,CSV,Описание,{self.lesson.id},2,3 + 3?,1,6,true\n"
+            f"b,CSV,Другой тест,{self.lesson.id},1,1 + 1?,1,2,true\n"
+        )
+        upload = SimpleUploadedFile("tests.csv", csv_content.encode())
+        response = self.client.post(url, {"file": upload}, format="multipart")
+        b"".join(response.streaming_content)
+
+        test = Test.objects.get(title="CSV", description="Описание")
+        self.assertEqual(test.lesson, self.lesson)
+        self.assertEqual(test.questions.count(), 2)
+        self.assertEqual(
+            list(
+                Answer.objects.filter(question__test=test, is_correct=True)
+                .order_by("answer")
+                .values_list("answer", flat=True)
+            ),
+            ["4", "6"],
+        )
+        other = Test.objects.get(title="CSV", description="Другой тест")
+        self.assertEqual(other.questions.get().answers.get().answer, "2")
+
+        upload = SimpleUploadedFile("tests.csv", b"title\nCSV\n")
+        response = self.client.post(url, {"file": upload}, format="multipart")
+        reports = b"".join(response.streaming_content).splitlines()
+        self.assertEqual(json.loads(reports[0])["status"], "error")
+
+        upload = SimpleUploadedFile("tests.txt", b"")
+        response = self.client.post(url, {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_delete_test(self):
         """Тестирование удаления теста"""
         create_data = {
@@ -328,6 +1478,103 @@ class TestTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
 
 
+class AsyncReadViewsTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(email="admin@lms.ru")
+        self.token = str(RoleRefreshToken.for_user(self.user).access_token)
+        self.section = Section.objects.create(
+            title="Test Course", description="Test Description", owner=self.user
+        )
+        self.lesson = Lesson.objects.create(
+            title="Test Lesson", description="Test Description", section=self.section
+        )
+        self.test = Test.objects.create(title="Test", lesson=self.lesson)
+        question = Question.objects.create(test=self.test, number=1, question="2+2?")
+        Answer.objects.create(question=question, number=1, answer="4")
+
+        self.factory = APIRequestFactory()
+        self.views = [
+            (AsyncSectionListApiView, "/sections/", {}),
+            (AsyncLessonRetrieveAPIView, "/lesson/{pk}/", {"pk": self.lesson.id}),
+            (AsyncTestRetrieveApiView, "/test/{pk}/", {"pk": self.test.id}),
+            (AsyncTestRetrieveApiView, "/test/{pk}/?fields=id", {"pk": self.test.id}),
+        ]
+        self.expected = [
+            self.client.get(
+                url.format(**kwargs), HTTP_AUTHORIZATION=f"Bearer {self.token}"
+            ).json()
+            for _, url, kwargs in self.views
+        ]
+
+    def tearDown(self):
+        get_cache().clear()
+
+    def request(self, url, **headers):
+        return self.factory.get(
+            url, HTTP_AUTHORIZATION=f"Bearer {self.token}", **headers
+        )
+
+    async def test_async_views_match_sync(self):
+        """Тестирование асинхронных представлений чтения с JWT"""
+        for (view_class, url, kwargs), expected in zip(self.views, self.expected):
+            view = view_class.as_view()
+            self.assertTrue(iscoroutinefunction(view))
+            response = await view(self.request(url.format(**kwargs)), **kwargs)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(json.loads(response.render().content), expected)
+
+        view = AsyncSectionListApiView.as_view()
+        response = await view(self.request("/sections/"))
+        self.assertEqual(response["X-Cache"], "HIT")
+        response = await view(self.request("/sections/?pagination=cursor"))
+        self.assertIsNone(response.data["next"])
+
+    async def test_async_views_auth_and_conditional(self):
+        """Тестирование аутентификации и условных запросов в async-представлениях"""
+        view = AsyncLessonRetrieveAPIView.as_view()
+        response = await view(
+            self.factory.get(f"/lesson/{self.lesson.id}/"), pk=self.lesson.id
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        url = f"/lesson/{self.lesson.id}/"
+        response = await view(self.request(url), pk=self.lesson.id)
+        response = await view(
+            self.request(url, HTTP_IF_NONE_MATCH=response["ETag"]), pk=self.lesson.id
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        view = AsyncTestRetrieveApiView.as_view()
+        response = await view(self.request("/test/0/"), pk=0)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ReadPathBenchmarkTest(LiveServerTestCase):
+    def test_bench_read_path(self):
+        """Тестирование нагрузочного сравнения эндпоинтов чтения"""
+        user = User.objects.create(email="admin@lms.ru")
+        section = Section.objects.create(title="Course", description="Course")
+        lesson = Lesson.objects.create(title="Lesson", description="-", section=section)
+        Test.objects.create(title="Test", lesson=lesson, owner=user)
+
+        out = StringIO()
+        call_command(
+            "bench_read_path",
+            "--wsgi",
+            self.live_server_url,
+            "--requests",
+            "6",
+            "--concurrency",
+            "3",
+            "--warmup",
+            "0",
+            stdout=out,
+        )
+        rows = out.getvalue().splitlines()[1:]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual([row.split()[-1] for row in rows], ["0", "0", "0"])
+
+
 class UserAnswerTest(APITestCase):
     def setUp(self):
         self.user = User.objects.create(email="admin@lms.ru")
@@ -374,6 +1621,21 @@ class UserAnswerTest(APITestCase):
         self.assertEqual(user_answer.answer, self.answer1_correct)
         self.assertIsNotNone(user_answer.submitted_at)
 
+    def test_submit_after_queryset_delete(self):
+        """Тестирование проверки после удаления вопроса QuerySet'ом"""
+        data = [{"question_number": 1, "answer_number": 1}]
+        url = f"/test/{self.test.id}/submit/"
+        response = self.client.post(url, data=data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = self.client.get(f"/test/{self.test.id}/")["ETag"]
+
+        Question.objects.filter(pk=self.question2.pk).delete()
+
+        self.assertNotEqual(self.client.get(f"/test/{self.test.id}/")["ETag"], etag)
+        response = self.client.post(url, data=data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["total"], 1)
+
     def test_submit_answers_success(self):
         """Тестирование успешной отправки ответов"""
         data = [
@@ -455,3 +1717,204 @@ class UserAnswerTest(APITestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_submit_answers_invalid_answer(self):
+        """Тестирование отправки несуществующего ответа"""
+        data = [
+            {"question_number": 1, "answer_number": 1},
+            {"question_number": 2, "answer_number": 5},
+        ]
+
+        response = self.client.post(
+            f"/test/{self.test.id}/submit/", data=data, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.json(), {"error": "У вопроса 2 нет ответа с номером 5."}
+        )
+        self.assertFalse(UserAnswer.objects.exists())
+
+    def test_submit_answers_constant_queries(self):
+        """Тестирование постоянного числа запросов при проверке теста"""
+
+        def submit(questions_count):
+            test = Test.objects.create(title=f"Тест {questions_count}", owner=self.user)
+            data = []
+            for number in range(1, questions_count + 1):
+                question = Question.objects.create(
+                    test=test, number=number, question=f"Вопрос {number}"
+                )
+                Answer.objects.create(
+                    question=question, number=1, answer="Да", is_correct=True
+                )
+                Answer.objects.create(question=question, number=2, answer="Нет")
+                data.append({"question_number": number, "answer_number": 1})
+
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(
+                    f"/test/{test.id}/submit/", data=data, format="json"
+                )
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.json()["correct"], questions_count)
+            return len(queries)
+
+        self.assertEqual(submit(2), submit(60))
+        self.assertEqual(UserAnswer.objects.filter(user=self.user).count(), 62)
+
+    def test_submit_answers_cached_answer_key(self):
+        """Тестирование проверки по кешированному ключу ответов"""
+        data = [
+            {"question_number": 1, "answer_number": 1},
+            {"question_number": 2, "answer_number": 1},
+        ]
+        url = f"/test/{self.test.id}/submit/"
+        self.client.post(url, data=data, format="json")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, data=data, format="json")
+
+        self.assertEqual(response.json()["correct"], 2)
+        for query in queries.captured_queries:
+            self.assertNotIn('"education_question"', query["sql"])
+            self.assertNotIn('"education_answer"', query["sql"])
+
+        self.answer2_correct.is_correct = False
+        self.answer2_correct.save()
+
+        response = self.client.post(url, data=data, format="json")
+        self.assertEqual(response.json()["correct"], 1)
+
+        self.client.delete(f"/test/delete/{self.test.id}/")
+        self.assertIsNone(answer_key_cache.get(self.test.id, self.test.version))
+
+    def test_answer_key_cache_size_limit(self):
+        """Тестирование вытеснения ключей из LRU-кеша"""
+        cache = AnswerKeyCache(maxsize=2)
+        for test_id in (1, 2, 3):
+            cache.set(test_id, AnswerKey(version=1, total=0, questions={}))
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(1, 1))
+        self.assertIsNotNone(cache.get(3, 1))
+        self.assertIsNone(cache.get(3, 2))
+
+    @override_settings(ASYNC_SUBMISSIONS=True)
+    def test_submit_answers_async(self):
+        """Тестирование асинхронной проверки ответов через очередь"""
+        data = [
+            {"question_number": 1, "answer_number": 1},
+            {"question_number": 2, "answer_number": 2},
+        ]
+
+        response = self.client.post(
+            f"/test/{self.test.id}/submit/", data=data, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        submission_id = response.json()["id"]
+        self.assertFalse(UserAnswer.objects.exists())
+
+        response = self.client.get(f"/submission/{submission_id}/")
+        self.assertEqual(response.json()["status"], Submission.PENDING)
+
+        call_command("grade_submissions", "--once", "--workers", "1", stdout=StringIO())
+
+        response = self.client.get(f"/submission/{submission_id}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["status"], Submission.DONE)
+        self.assertEqual(
+            response.json()["result"],
+            {
+                "test": "Тест по математике",
+                "correct": 1,
+                "total": 2,
+                "score": "50.0 %",
+            },
+        )
+        self.assertEqual(UserAnswer.objects.filter(user=self.user).count(), 2)
+
+    @override_settings(ASYNC_SUBMISSIONS=True)
+    def test_submit_answers_async_invalid(self):
+        """Тестирование асинхронной проверки с ошибкой в ответах"""
+        data = [{"question_number": 3, "answer_number": 1}]
+
+        response = self.client.post(
+            f"/test/{self.test.id}/submit/", data=data, format="json"
+        )
+        submission_id = response.json()["id"]
+
+        call_command("grade_submissions", "--once", "--workers", "1", stdout=StringIO())
+
+        submission = Submission.objects.get(pk=submission_id)
+        self.assertEqual(submission.status, Submission.FAILED)
+        self.assertEqual(
+            submission.error,
+            "Вопрос с номером 3 не найден в тесте 'Тест по математике'.",
+        )
+
+    def test_grade_submissions_unexpected_errors(self):
+        """Тестирование отправок, проверка которых завершилась исключением"""
+        empty = Test.objects.create(title="Пустой тест", owner=self.user)
+        without_questions = Submission.objects.create(
+            user=self.user, test=empty, payload=[]
+        )
+        malformed = Submission.objects.create(
+            user=self.user, test=self.test, payload=[{"question": 1}]
+        )
+
+        call_command("grade_submissions", "--once", "--workers", "1", stdout=StringIO())
+
+        without_questions.refresh_from_db()
+        self.assertEqual(without_questions.status, Submission.FAILED)
+        self.assertEqual(without_questions.error, "В тесте 'Пустой тест' нет вопросов.")
+        malformed.refresh_from_db()
+        self.assertEqual(malformed.status, Submission.FAILED)
+        self.assertEqual(malformed.error, "KeyError: 'question_number'")
+
+    def test_submit_answers_saves_attempt(self):
+        """Тестирование сохранения попыток прохождения теста"""
+        url = f"/test/{self.test.id}/submit/"
+        self.client.post(
+            url,
+            data=[
+                {"question_number": 1, "answer_number": 1},
+                {"question_number": 2, "answer_number": 2},
+            ],
+            format="json",
+        )
+        self.client.post(
+            url,
+            data=[
+                {"question_number": 1, "answer_number": 1},
+                {"question_number": 2, "answer_number": 1},
+            ],
+            format="json",
+        )
+
+        self.assertEqual(TestAttempt.objects.filter(user=self.user).count(), 2)
+        attempt = TestAttempt.objects.get(score=50.0)
+        self.assertEqual((attempt.correct, attempt.total), (1, 2))
+        self.assertEqual(
+            set(attempt.answers.all()), {self.answer1_correct, self.answer2_wrong}
+        )
+
+        response = self.client.get(f"/test/{self.test.id}/attempts/")
+        self.assertEqual(response.json()["count"], 2)
+
+        response = self.client.get(f"/test/{self.test.id}/attempts/best/")
+        self.assertEqual(response.json()["score"], 100.0)
+
+        response = self.client.get(f"/test/{self.test.id}/results/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [result["score"] for result in response.json()["results"]],
+            [100.0, 50.0],
+        )
+
+        self.client.force_authenticate(User.objects.create(email="student@lms.ru"))
+        response = self.client.get(f"/test/{self.test.id}/results/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get(f"/test/{self.test.id}/attempts/best/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
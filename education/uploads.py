@@ -0,0 +1,228 @@
+import fcntl
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from education.models import Lesson, MaterialUpload
+
+READ_BLOCK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """ Ошибка загрузки материала по частям """
+
+
+class UploadOffsetError(UploadError):
+    """ Часть отправлена не с того смещения, на котором остановилась загрузка """
+
+    def __init__(self, offset):
+        super().__init__(f"Ожидалась часть со смещения {offset}.")
+        self.offset = offset
+
+
+class PartFile(File):
+    """ Файл частей загрузки, который хранилище может переместить без копирования
+
+    digest — уже посчитанный SHA-256 содержимого, чтобы хранилище не читало
+    файл ещё раз.
+    """
+
+    def __init__(self, file, digest=None, name=None):
+        super().__init__(file, name)
+        self.digest = digest
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def upload_dir():
+    return settings.MATERIAL_UPLOAD_DIR or os.path.join(settings.MEDIA_ROOT, "uploads")
+
+
+def part_path(upload):
+    return os.path.join(upload_dir(), f"{upload.id}.part")
+
+
+def validate_material_name(filename):
+    """ Проверка имени файла правилами поля Lesson.material """
+    field = Lesson._meta.get_field("material")
+    try:
+        for validator in field.validators:
+            validator(File(None, name=filename))
+    except ValidationError as e:
+        raise UploadError(" ".join(e.messages))
+
+
+def start_upload(lesson, owner, filename, size, checksum=""):
+    """ Создание загрузки и пустого файла для её частей """
+    validate_material_name(filename)
+    if size > settings.MATERIAL_UPLOAD_MAX_SIZE:
+        raise UploadError(
+            f"Размер файла больше {settings.MATERIAL_UPLOAD_MAX_SIZE} байт."
+        )
+
+    upload = MaterialUpload.objects.create(
+        lesson=lesson,
+        owner=owner,
+        filename=os.path.basename(filename),
+        size=size,
+        checksum=checksum.lower(),
+    )
+    os.makedirs(upload_dir(), exist_ok=True)
+    open(part_path(upload), "wb").close()
+    return upload
+
+
+def check_chunk(upload, offset, length):
+    """ Можно ли дописать часть длины length со смещения offset """
+    if upload.status != MaterialUpload.UPLOADING:
+        raise UploadError("Загрузка уже завершена.")
+    if offset != upload.offset:
+        raise UploadOffsetError(upload.offset)
+    if upload.offset + length > upload.size:
+        raise UploadError("Часть выходит за объявленный размер файла.")
+
+
+def open_part(upload):
+    """ Файл частей загрузки под исключительной блокировкой (flock)
+
+    Блокировка файла, а не строки в базе данных, держится, пока часть
+    читается из запроса, поэтому транзакция не ждёт медленного клиента.
+    """
+    try:
+        part = open(part_path(upload), "r+b")
+    except FileNotFoundError:
+        upload.refresh_from_db()
+        if upload.status != MaterialUpload.UPLOADING:
+            raise UploadError("Загрузка уже завершена.")
+        raise UploadError("Файл загрузки не найден.")
+    fcntl.flock(part, fcntl.LOCK_EX)
+    return part
+
+
+def write_chunk(upload_id, owner, offset, stream, length):
+    """ Запись части в файл загрузки с её смещения
+
+    Под блокировкой файла часть пишется сразу на место, затем смещение
+    сдвигается условным UPDATE по ожидаемому смещению (compare-and-set).
+    Байты после сохранённого смещения (от прерванной записи) отбрасываются.
+    """
+    upload = MaterialUpload.objects.get(id=upload_id, owner=owner)
+    with open_part(upload) as part:
+        upload.refresh_from_db()
+        check_chunk(upload, offset, length)
+
+        written = 0
+        part.truncate(offset)
+        part.seek(offset)
+        while written < length:
+            data = stream.read(min(READ_BLOCK_SIZE, length - written))
+            if not data:
+                break
+            part.write(data)
+            written += len(data)
+        part.flush()
+
+        moved = MaterialUpload.objects.filter(
+            id=upload.id, status=MaterialUpload.UPLOADING, offset=offset
+        ).update(offset=offset + written, updated_at=timezone.now())
+        if not moved:
+            upload.refresh_from_db()
+            check_chunk(upload, offset, length)
+            raise UploadOffsetError(upload.offset)
+
+    upload.offset = offset + written
+    return upload
+
+
+def part_digest(part):
+    digest = hashlib.sha256()
+    part.seek(0)
+    for block in iter(lambda: part.read(READ_BLOCK_SIZE), b""):
+        digest.update(block)
+    return digest.hexdigest()
+
+
+def finalize_upload(upload_id, owner, checksum=""):
+    """ Проверка размера и контрольной суммы и прикрепление файла к уроку
+
+    SHA-256 считается один раз под блокировкой файла, а не строки, и
+    передаётся хранилищу. Файл перемещается в хранилище в короткой
+    транзакции вместе со ссылкой на него и строками урока и загрузки.
+    """
+    upload = MaterialUpload.objects.get(id=upload_id, owner=owner)
+    if upload.status == MaterialUpload.COMPLETE:
+        return upload
+
+    with open_part(upload) as part:
+        upload.refresh_from_db()
+        if upload.status == MaterialUpload.COMPLETE:
+            return upload
+        if upload.offset != upload.size:
+            raise UploadOffsetError(upload.offset)
+
+        digest = part_digest(part)
+        expected = (checksum or upload.checksum).lower()
+        if expected and digest != expected:
+            raise UploadError("Контрольная сумма файла не совпадает.")
+        validate_material_name(upload.filename)
+
+        lesson = upload.lesson
+        lesson.material = PartFile(part, digest, upload.filename)
+        with transaction.atomic():
+            lesson.save(update_fields=["material"])
+            MaterialUpload.objects.filter(id=upload.id).update(
+                status=MaterialUpload.COMPLETE, updated_at=timezone.now()
+            )
+    if os.path.exists(part_path(upload)):
+        os.remove(part_path(upload))
+
+    upload.refresh_from_db()
+    return upload
+
+
+def abort_upload(upload):
+    if os.path.exists(part_path(upload)):
+        os.remove(part_path(upload))
+    upload.delete()
+
+
+def purge_stale_uploads(max_age):
+    """ Удаление брошенных загрузок и их файлов частей
+
+    Удаляются незавершённые загрузки, не менявшиеся дольше max_age, и
+    оставшиеся без загрузки файлы в каталоге частей. Возвращает число
+    удалённых загрузок и файлов.
+    """
+    cutoff = timezone.now() - max_age
+    stale = MaterialUpload.objects.filter(
+        status=MaterialUpload.UPLOADING, updated_at__lt=cutoff
+    )
+    uploads = 0
+    for upload in stale.iterator():
+        abort_upload(upload)
+        uploads += 1
+
+    files = 0
+    if os.path.isdir(upload_dir()):
+        active = {
+            str(upload_id)
+            for upload_id in MaterialUpload.objects.filter(
+                status=MaterialUpload.UPLOADING
+            ).values_list("id", flat=True)
+        }
+        for entry in os.scandir(upload_dir()):
+            if (
+                entry.is_file()
+                and entry.name.endswith(".part")
+                and entry.name.split(".")[0] not in active
+                and entry.stat().st_mtime < cutoff.timestamp()
+            ):
+                os.remove(entry.path)
+                files += 1
+    return uploads, files
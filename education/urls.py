@@ -1,25 +1,43 @@
+from django.conf import settings
 from django.urls import path
 
 from .apps import EducationConfig
 from .views import (
     SubmitAnswersView,
     SectionCreateApiView,
-    SectionListApiView,
     SectionRetrieveAPIView,
     SectionUpdateAPIView,
     SectionDestroyAPIView,
     LessonCreateAPIView,
     LessonListAPIView,
-    LessonRetrieveAPIView,
     LessonUpdateAPIView,
     LessonDestroyAPIView,
+    LessonMaterialDownloadView,
+    MaterialUploadCreateApiView,
+    MaterialUploadApiView,
+    MaterialUploadFinalizeApiView,
     TestCreateApiView,
     TestUpdateApiView,
+    TestImportApiView,
     TestListApiView,
     TestDestroyApiView,
-    TestRetrieveApiView,
+    SubmissionRetrieveApiView,
+    TestAttemptListApiView,
+    TestBestAttemptApiView,
+    TestResultsApiView,
+    CatalogCacheStatsApiView,
+    SearchApiView,
 )
 
+if settings.ASYNC_READ_VIEWS:
+    from .async_views import (
+        AsyncLessonRetrieveAPIView as LessonRetrieveAPIView,
+        AsyncSectionListApiView as SectionListApiView,
+        AsyncTestRetrieveApiView as TestRetrieveApiView,
+    )
+else:
+    from .views import LessonRetrieveAPIView, SectionListApiView, TestRetrieveApiView
+
 app_name = EducationConfig.name
 
 urlpatterns = [
@@ -45,10 +63,53 @@ urlpatterns = [
     path(
         "lesson/delete/<int:pk>/", LessonDestroyAPIView.as_view(), name="lesson_delete"
     ),
+    path(
+        "lesson/<int:pk>/material/",
+        LessonMaterialDownloadView.as_view(),
+        name="lesson_material",
+    ),
+    path(
+        "lesson/<int:pk>/material/uploads/",
+        MaterialUploadCreateApiView.as_view(),
+        name="material_upload_create",
+    ),
+    path(
+        "material/upload/<uuid:pk>/",
+        MaterialUploadApiView.as_view(),
+        name="material_upload",
+    ),
+    path(
+        "material/upload/<uuid:pk>/finalize/",
+        MaterialUploadFinalizeApiView.as_view(),
+        name="material_upload_finalize",
+    ),
     path("test/create/", TestCreateApiView.as_view(), name="test_create"),
     path("tests/", TestListApiView.as_view(), name="test_list"),
+    path("tests/import/", TestImportApiView.as_view(), name="test_import"),
     path("test/<int:pk>/", TestRetrieveApiView.as_view(), name="test_get"),
     path("test/update/<int:pk>/", TestUpdateApiView.as_view(), name="test_update"),
     path("test/delete/<int:pk>/", TestDestroyApiView.as_view(), name="test_delete"),
     path("test/<int:pk>/submit/", SubmitAnswersView.as_view(), name="submit_answer"),
+    path(
+        "test/<int:pk>/attempts/",
+        TestAttemptListApiView.as_view(),
+        name="test_attempts",
+    ),
+    path(
+        "test/<int:pk>/attempts/best/",
+        TestBestAttemptApiView.as_view(),
+        name="test_best_attempt",
+    ),
+    path("test/<int:pk>/results/", TestResultsApiView.as_view(), name="test_results"),
+    path(
+        "submission/<int:pk>/",
+        SubmissionRetrieveApiView.as_view(),
+        name="submission_get",
+    ),
+    path("search/", SearchApiView.as_view(), name="search"),
+    path(
+        "catalog/cache-stats/",
+        CatalogCacheStatsApiView.as_view(),
+        name="catalog_cache_stats",
+    ),
 ]
@@ -1,22 +1,78 @@
-from rest_framework import generics
+import io
+
+from django.conf import settings
+from django.db.models import Count
+from django.http import StreamingHttpResponse
+from rest_framework import generics, status
+from rest_framework.exceptions import NotFound
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import IsAdminUser
 from rest_framework.views import APIView
-from education.models import Test, Question, Answer, UserAnswer, Section, Lesson
+from education.models import (
+    Test,
+    Section,
+    Lesson,
+    Submission,
+    TestAttempt,
+    MaterialUpload,
+)
 from .serializers import (
     TestSerializer,
     UserAnswerSerializer,
     SectionSerializer,
     LessonSerializer,
     TestGetSerializer,
+    SubmissionSerializer,
+    TestAttemptSerializer,
+    MaterialUploadSerializer,
+)
+from education.conditional import ConditionalRetrieveMixin
+from education.course_trees import absolutize_tree, get_section_tree, is_course_tree
+from education.delivery import get_test_payload
+from education.downloads import file_download_response
+from education.importers import (
+    READERS,
+    ImportFormatError,
+    detect_format,
+    import_tests,
+)
+from education.fieldsets import ExpandableQuerysetMixin, get_fieldsets
+from education.paginators import CursorPaginationMixin, EducationPaginator
+from education.search import search
+from education.services import GradingError, build_result, grade_answers
+from education.response_cache import CachedResponseMixin, get_cache_stats
+from education.streaming import (
+    STREAM_CONTENT_TYPES,
+    iter_import_reports,
+    stream_response,
+)
+from education.submissions import enqueue_submission
+from education.uploads import (
+    UploadError,
+    UploadOffsetError,
+    abort_upload,
+    finalize_upload,
+    start_upload,
+    write_chunk,
 )
-from education.paginators import EducationPaginator
 from users.permissions import IsOwner, IsTeacher, IsModer
 
 
-class SectionListApiView(generics.ListAPIView):
+class SectionListApiView(
+    CachedResponseMixin,
+    CursorPaginationMixin,
+    ExpandableQuerysetMixin,
+    generics.ListAPIView,
+):
     serializer_class = SectionSerializer
-    queryset = Section.objects.all()
+    queryset = Section.objects.annotate(lessons_count=Count("lessons")).order_by(
+        "title"
+    )
     pagination_class = EducationPaginator
+    cursor_ordering = ("title", "id")
+    cache_namespaces = ("sections",)
 
 
 class SectionCreateApiView(generics.CreateAPIView):
@@ -28,9 +84,27 @@ class SectionCreateApiView(generics.CreateAPIView):
         serializer.save(owner=self.request.user)
 
 
-class SectionRetrieveAPIView(generics.RetrieveAPIView):
+class SectionRetrieveAPIView(
+    ConditionalRetrieveMixin,
+    CachedResponseMixin,
+    ExpandableQuerysetMixin,
+    generics.RetrieveAPIView,
+):
     serializer_class = SectionSerializer
-    queryset = Section.objects.all()
+    queryset = Section.objects.annotate(lessons_count=Count("lessons")).order_by(
+        "title"
+    )
+    cache_namespaces = ("section:{pk}",)
+
+    def retrieve(self, request, *args, **kwargs):
+        fields, expand = get_fieldsets(request)
+        if fields is not None or not is_course_tree(expand):
+            return super().retrieve(request, *args, **kwargs)
+
+        document = get_section_tree(kwargs["pk"])
+        if document is None:
+            raise NotFound()
+        return Response(absolutize_tree(document, request))
 
 
 class SectionUpdateAPIView(generics.UpdateAPIView):
@@ -54,13 +128,22 @@ class LessonCreateAPIView(generics.CreateAPIView):
         serializer.save(owner=self.request.user)
 
 
-class LessonListAPIView(generics.ListAPIView):
+class LessonListAPIView(
+    CachedResponseMixin,
+    CursorPaginationMixin,
+    ExpandableQuerysetMixin,
+    generics.ListAPIView,
+):
     serializer_class = LessonSerializer
     queryset = Lesson.objects.all()
     pagination_class = EducationPaginator
+    cursor_ordering = ("title", "section_id", "id")
+    cache_namespaces = ("lessons",)
 
 
-class LessonRetrieveAPIView(generics.RetrieveAPIView):
+class LessonRetrieveAPIView(
+    ConditionalRetrieveMixin, ExpandableQuerysetMixin, generics.RetrieveAPIView
+):
     serializer_class = LessonSerializer
     queryset = Lesson.objects.all()
 
@@ -77,6 +160,98 @@ class LessonDestroyAPIView(generics.DestroyAPIView):
     permission_classes = [IsModer | IsOwner | IsTeacher]
 
 
+class LessonMaterialDownloadView(APIView):
+
+    def get(self, request, pk):
+        lesson = get_object_or_404(Lesson.objects.only("id", "material"), pk=pk)
+        if not lesson.material:
+            raise NotFound("У урока нет материала.")
+        try:
+            return file_download_response(request, lesson.material)
+        except FileNotFoundError:
+            raise NotFound("Файл материала не найден.")
+
+
+class MaterialUploadCreateApiView(APIView):
+    permission_classes = [IsOwner]
+
+    def post(self, request, pk):
+        lesson = get_object_or_404(Lesson, pk=pk)
+        self.check_object_permissions(request, lesson)
+        serializer = MaterialUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            upload = start_upload(lesson, request.user, **serializer.validated_data)
+        except UploadError as e:
+            return Response({"error": str(e)}, status=400)
+        return Response(
+            MaterialUploadSerializer(upload).data, status=status.HTTP_201_CREATED
+        )
+
+
+class MaterialUploadApiView(APIView):
+
+    def get(self, request, pk):
+        upload = get_object_or_404(MaterialUpload, pk=pk, owner=request.user)
+        return Response(MaterialUploadSerializer(upload).data)
+
+    def put(self, request, pk):
+        try:
+            offset = int(
+                request.headers.get("Upload-Offset") or request.query_params["offset"]
+            )
+            length = int(request.headers["Content-Length"])
+        except (KeyError, ValueError):
+            return Response(
+                {"error": "Укажите Upload-Offset и Content-Length части."},
+                status=400,
+            )
+        if length > settings.MATERIAL_UPLOAD_CHUNK_SIZE:
+            return Response(
+                {"error": "Часть больше допустимого размера."},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+
+        try:
+            upload = write_chunk(pk, request.user, offset, request.stream, length)
+        except MaterialUpload.DoesNotExist:
+            raise NotFound
+        except UploadOffsetError as e:
+            return Response(
+                {"error": str(e), "offset": e.offset}, status=status.HTTP_409_CONFLICT
+            )
+        except UploadError as e:
+            return Response({"error": str(e)}, status=400)
+        return Response({"id": upload.id, "offset": upload.offset})
+
+    def delete(self, request, pk):
+        upload = get_object_or_404(MaterialUpload, pk=pk, owner=request.user)
+        abort_upload(upload)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class MaterialUploadFinalizeApiView(APIView):
+
+    def post(self, request, pk):
+        try:
+            upload = finalize_upload(pk, request.user, request.data.get("checksum", ""))
+        except MaterialUpload.DoesNotExist:
+            raise NotFound
+        except UploadOffsetError as e:
+            return Response(
+                {"error": str(e), "offset": e.offset}, status=status.HTTP_409_CONFLICT
+            )
+        except UploadError as e:
+            return Response({"error": str(e)}, status=400)
+        return Response(
+            {
+                **MaterialUploadSerializer(upload).data,
+                "material": upload.lesson.material.url,
+            }
+        )
+
+
 class TestCreateApiView(generics.CreateAPIView):
     serializer_class = TestSerializer
     queryset = Test.objects.all()
@@ -86,9 +261,18 @@ class TestCreateApiView(generics.CreateAPIView):
         serializer.save(owner=self.request.user)
 
 
-class TestListApiView(generics.ListAPIView):
+class TestListApiView(ExpandableQuerysetMixin, generics.ListAPIView):
     serializer_class = TestGetSerializer
-    queryset = Test.objects.all()
+    queryset = Test.objects.order_by("id")
+    pagination_class = EducationPaginator
+
+    def list(self, request, *args, **kwargs):
+        stream_format = request.query_params.get("stream")
+        if stream_format not in STREAM_CONTENT_TYPES:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        return stream_response(self.get_serializer(), queryset, stream_format)
 
 
 class TestUpdateApiView(generics.UpdateAPIView):
@@ -103,10 +287,49 @@ class TestDestroyApiView(generics.DestroyAPIView):
     permission_classes = [IsOwner | IsModer]
 
 
-class TestRetrieveApiView(generics.RetrieveAPIView):
-    queryset = Test.objects.prefetch_related("questions__answers")
+class TestRetrieveApiView(
+    ConditionalRetrieveMixin, ExpandableQuerysetMixin, generics.RetrieveAPIView
+):
+    queryset = Test.objects.all()
     serializer_class = TestGetSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        if "fields" in request.query_params or "expand" in request.query_params:
+            return super().retrieve(request, *args, **kwargs)
+
+        payload = get_test_payload(kwargs["pk"])
+        if payload is None:
+            raise NotFound()
+        return Response(payload)
+
+
+class TestImportApiView(APIView):
+    parser_classes = [MultiPartParser]
+    permission_classes = [IsModer | IsTeacher]
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"error": "Загрузите файл в поле file."}, status=400)
+
+        try:
+            file_format = request.data.get("format") or detect_format(upload.name)
+        except ImportFormatError as e:
+            return Response({"error": str(e)}, status=400)
+        if file_format not in READERS:
+            return Response(
+                {"error": f"Неизвестный формат файла '{file_format}'."}, status=400
+            )
+
+        stream = io.TextIOWrapper(upload, encoding="utf-8", newline="")
+        reports = import_tests(
+            stream, file_format, request.user, settings.IMPORT_BATCH_SIZE
+        )
+        return StreamingHttpResponse(
+            iter_import_reports(reports),
+            content_type=STREAM_CONTENT_TYPES["ndjson"],
+        )
+
 
 class SubmitAnswersView(APIView):
 
@@ -115,46 +338,85 @@ class SubmitAnswersView(APIView):
         serializer = UserAnswerSerializer(data=request.data, many=True)
         serializer.is_valid(raise_exception=True)
 
-        user = request.user
-        answers_data = serializer.validated_data
-
-        correct_count = 0
-        total = test.questions.count()
-
-        for ans in answers_data:
-            q_num = ans["question_number"]
-            a_num = ans["answer_number"]
-
-            try:
-                question = Question.objects.get(test=test, number=q_num)
-            except Question.DoesNotExist:
-                return Response(
-                    {
-                        "error": f"Вопрос с номером {q_num} не найден в тесте '{test.title}'."
-                    },
-                    status=400,
-                )
-
-            try:
-                answer = Answer.objects.get(question=question, number=a_num)
-            except Answer.DoesNotExist:
-                return Response(
-                    {"error": f"У вопроса {q_num} нет ответа с номером {a_num}."},
-                    status=400,
-                )
-
-            UserAnswer.objects.update_or_create(
-                user=user, question=question, defaults={"answer": answer}
+        if settings.ASYNC_SUBMISSIONS:
+            submission = enqueue_submission(
+                test, request.user, serializer.validated_data
+            )
+            return Response(
+                {"id": submission.id, "status": submission.status},
+                status=status.HTTP_202_ACCEPTED,
             )
 
-            if answer.is_correct:
-                correct_count += 1
+        try:
+            attempt = grade_answers(test, request.user, serializer.validated_data)
+        except GradingError as e:
+            return Response({"error": str(e)}, status=400)
 
-        return Response(
-            {
-                "test": test.title,
-                "correct": correct_count,
-                "total": total,
-                "score": f"{round((correct_count / total) * 100, 2)} %",
-            }
+        return Response(build_result(attempt))
+
+
+class SubmissionRetrieveApiView(generics.RetrieveAPIView):
+    serializer_class = SubmissionSerializer
+
+    def get_queryset(self):
+        return Submission.objects.filter(user=self.request.user)
+
+
+class TestAttemptListApiView(generics.ListAPIView):
+    serializer_class = TestAttemptSerializer
+    pagination_class = EducationPaginator
+
+    def get_queryset(self):
+        return TestAttempt.objects.filter(
+            user=self.request.user, test_id=self.kwargs["pk"]
+        )
+
+
+class TestBestAttemptApiView(generics.RetrieveAPIView):
+    serializer_class = TestAttemptSerializer
+
+    def get_object(self):
+        attempt = (
+            TestAttempt.objects.filter(
+                user=self.request.user, test_id=self.kwargs["pk"]
+            )
+            .order_by("-score", "-graded_at")
+            .first()
         )
+        if attempt is None:
+            raise NotFound()
+        return attempt
+
+
+class TestResultsApiView(generics.ListAPIView):
+    serializer_class = TestAttemptSerializer
+    pagination_class = EducationPaginator
+    permission_classes = [IsOwner | IsModer]
+
+    def get_queryset(self):
+        test = get_object_or_404(Test, pk=self.kwargs["pk"])
+        self.check_object_permissions(self.request, test)
+        return TestAttempt.objects.filter(test=test).order_by("-score", "-graded_at")
+
+
+class CatalogCacheStatsApiView(APIView):
+    permission_classes = [IsModer | IsAdminUser]
+
+    def get(self, request):
+        return Response(get_cache_stats())
+
+
+class SearchApiView(APIView):
+
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return Response(
+                {"error": "Укажите поисковый запрос в параметре q."}, status=400
+            )
+
+        try:
+            limit = min(max(int(request.query_params.get("limit", 20)), 1), 100)
+        except ValueError:
+            limit = 20
+        return Response({"query": query, "results": search(query, limit)})
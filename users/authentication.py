@@ -0,0 +1,137 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from users.models import User
+
+# Поля пользователя, которые нужны проверкам прав и записи владельца,
+# в порядке полей модели (этого требует Model.from_db)
+USER_ROW_FIELDS = tuple(
+    field.attname
+    for field in User._meta.concrete_fields
+    if field.attname in {"id", "email", "is_active", "is_staff", "is_superuser"}
+)
+
+
+class UserRowCache:
+    """ Кеш строк пользователей в памяти процесса с коротким временем жизни """
+
+    def __init__(self, ttl, maxsize):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is None:
+                return None
+            expires, row = entry
+            if expires <= time.monotonic():
+                del self._data[user_id]
+                return None
+            self._data.move_to_end(user_id)
+            return row
+
+    def set(self, user_id, row):
+        with self._lock:
+            self._data[user_id] = (time.monotonic() + self.ttl, row)
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._data.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+user_row_cache = UserRowCache(settings.USER_CACHE_TTL, settings.USER_CACHE_SIZE)
+
+
+def user_row_query(user_id):
+    return User.objects.filter(pk=user_id).values_list(*USER_ROW_FIELDS)
+
+
+def get_user_row(user_id):
+    """ Строка пользователя из кеша процесса или из базы данных """
+    row = user_row_cache.get(user_id)
+    if row is None:
+        row = user_row_query(user_id).first()
+        if row is not None:
+            user_row_cache.set(user_id, row)
+    return row
+
+
+async def aget_user_row(user_id):
+    """ Асинхронный вариант get_user_row для ASGI-представлений """
+    row = user_row_cache.get(user_id)
+    if row is None:
+        row = await user_row_query(user_id).afirst()
+        if row is not None:
+            user_row_cache.set(user_id, row)
+    return row
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """ JWT-аутентификация без запроса пользователя на каждый запрос
+
+    Пользователь собирается из закешированной строки как объект модели
+    с отложенной загрузкой остальных полей, поэтому его можно указывать
+    владельцем объектов. Роли берутся из claims токена (users.roles).
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            return super().get_user(validated_token)
+        return self.build_user(get_user_row(self.get_user_id(validated_token)))
+
+    async def aauthenticate(self, request):
+        """ Асинхронная аутентификация для ASGI-представлений """
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        if api_settings.CHECK_REVOKE_TOKEN:
+            user = await sync_to_async(super().get_user)(validated_token)
+        else:
+            row = await aget_user_row(self.get_user_id(validated_token))
+            user = self.build_user(row)
+        return user, validated_token
+
+    def get_user_id(self, validated_token):
+        try:
+            return int(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, TypeError, ValueError) as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+    def build_user(self, row):
+        if row is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        user = User.from_db(DEFAULT_DB_ALIAS, USER_ROW_FIELDS, row)
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
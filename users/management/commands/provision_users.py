@@ -0,0 +1,44 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.provisioning import password_pool, provision_users
+
+
+class Command(BaseCommand):
+    help = "Массовое создание пользователей из CSV с параллельным хешированием"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", help="CSV с колонками email, password, groups и профилем"
+        )
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        counts = {"created": 0, "skipped": 0, "error": 0}
+        start = time.perf_counter()
+        with (
+            password_pool(options["workers"]) as pool,
+            open(options["path"], encoding="utf-8", newline="") as stream,
+        ):
+            for report in provision_users(stream, pool, options["batch_size"]):
+                counts[report["status"]] += 1
+                if report["status"] == "skipped":
+                    self.stdout.write(
+                        f"Line {report['line']}: {report['email']} already exists"
+                    )
+                elif report["status"] == "error":
+                    self.stderr.write(f"Line {report['line']}: {report['errors']}")
+                elif counts["created"] % options["batch_size"] == 0:
+                    self.stdout.write(f"Created {counts['created']} users")
+        elapsed = time.perf_counter() - start
+
+        rate = counts["created"] / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {counts['created']} users, skipped {counts['skipped']}, "
+                f"failed {counts['error']} in {elapsed:.2f} s ({rate:.1f} users/s)"
+            )
+        )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from users.models import User
+from users.thumbnails import prune_renditions, source_digest
+
+
+class Command(BaseCommand):
+    help = "Удаление миниатюр аватаров, которые больше не используются"
+
+    def handle(self, *args, **options):
+        digests = set()
+        for name in (
+            User.objects.exclude(avatar="")
+            .exclude(avatar__isnull=True)
+            .values_list("avatar", flat=True)
+        ):
+            try:
+                digests.add(source_digest(name))
+            except OSError:
+                continue
+        removed = prune_renditions(digests)
+
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} thumbnails"))
@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.blacklist import purge_expired_tokens
+
+
+class Command(BaseCommand):
+    help = "Удаление истёкших refresh-токенов и записей чёрного списка пачками"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        purged = purge_expired_tokens(options["batch_size"])
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Purged {purged} expired tokens in {elapsed:.2f} s")
+        )
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:09
+
+import education.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="user",
+            name="avatar",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=education.storage.ContentAddressedStorage(),
+                upload_to="avatars/",
+                verbose_name="Фото",
+            ),
+        ),
+    ]
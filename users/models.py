@@ -1,8 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 
+from education.storage import StoredFilesMixin, content_storage
 
-class User(AbstractUser):
+
+class User(StoredFilesMixin, AbstractUser):
     """ Модель пользователя """
     username = None
     email = models.EmailField(unique=True, verbose_name="email")
@@ -10,7 +12,11 @@ class User(AbstractUser):
         max_length=15, null=True, blank=True, verbose_name="Номер телефона"
     )
     avatar = models.ImageField(
-        upload_to="avatars/", blank=True, null=True, verbose_name="Фото"
+        upload_to="avatars/",
+        storage=content_storage,
+        blank=True,
+        null=True,
+        verbose_name="Фото",
     )
     country = models.CharField(max_length=50, blank=True, verbose_name="Город")
 
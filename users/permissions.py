@@ -1,10 +1,15 @@
 from rest_framework.permissions import BasePermission
 
+from users.roles import MODERATORS, TEACHERS, aget_roles, get_roles
+
 
 class IsModer(BasePermission):
     """ Функция выборки модераторов """
     def has_permission(self, request, view):
-        return request.user.groups.filter(name="Moderators").exists()
+        return MODERATORS in get_roles(request)
+
+    async def ahas_permission(self, request, view):
+        return MODERATORS in await aget_roles(request)
 
 
 class IsOwner(BasePermission):
@@ -18,4 +23,7 @@ class IsOwner(BasePermission):
 class IsTeacher(BasePermission):
     """ Функция выборки преподавателей """
     def has_permission(self, request, view):
-        return request.user.groups.filter(name="Teachers").exists()
+        return TEACHERS in get_roles(request)
+
+    async def ahas_permission(self, request, view):
+        return TEACHERS in await aget_roles(request)
@@ -0,0 +1,106 @@
+import csv
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from users.models import User
+
+# Необязательные колонки CSV, которые переносятся в модель как есть
+PROFILE_FIELDS = ("first_name", "last_name", "phone_number", "country")
+
+# Сколько паролей отправляется процессу пула за раз
+HASH_CHUNK_SIZE = 16
+
+
+def password_pool(workers):
+    """ Пул процессов для хеширования паролей или None для работы в текущем """
+    if workers <= 1:
+        return nullcontext()
+    return ProcessPoolExecutor(max_workers=workers, initializer=django.setup)
+
+
+def hash_passwords(passwords, pool=None):
+    """ Хеширование паролей, в пуле процессов при его наличии """
+    if pool is None:
+        return [make_password(password) for password in passwords]
+    return list(pool.map(make_password, passwords, chunksize=HASH_CHUNK_SIZE))
+
+
+def read_users(stream):
+    """ Строки CSV с email, паролем, профилем и группами через ';' """
+    reader = csv.DictReader(stream)
+    for row in reader:
+        email = (row.get("email") or "").strip().lower()
+        try:
+            validate_email(email)
+        except ValidationError:
+            yield reader.line_num, None, f"Некорректный email '{email}'"
+            continue
+        groups = (row.get("groups") or "").split(";")
+        profile = {field: row[field] for field in PROFILE_FIELDS if row.get(field)}
+        user = {
+            "email": email,
+            "password": row.get("password") or None,
+            "profile": profile,
+            "groups": [name.strip() for name in groups if name.strip()],
+        }
+        yield reader.line_num, user, None
+
+
+def save_batch(batch, pool, groups):
+    """ Создание пачки пользователей и их членства в группах """
+    emails = [row["email"] for _, row in batch]
+    existing = set(
+        User.objects.filter(email__in=emails).values_list("email", flat=True)
+    )
+    new = []
+    for line, row in batch:
+        if row["email"] in existing:
+            yield {"line": line, "status": "skipped", "email": row["email"]}
+        else:
+            existing.add(row["email"])
+            new.append((line, row))
+
+    passwords = hash_passwords([row["password"] for _, row in new], pool)
+    users = [
+        User(email=row["email"], password=password, is_active=True, **row["profile"])
+        for (_, row), password in zip(new, passwords)
+    ]
+
+    for name in {name for _, row in new for name in row["groups"]} - set(groups):
+        groups[name] = Group.objects.get_or_create(name=name)[0].id
+
+    with transaction.atomic():
+        User.objects.bulk_create(users)
+        User.groups.through.objects.bulk_create(
+            User.groups.through(user_id=user.id, group_id=groups[name])
+            for user, (_, row) in zip(users, new)
+            for name in row["groups"]
+        )
+
+    for (line, _), user in zip(new, users):
+        yield {"line": line, "status": "created", "id": user.id}
+
+
+def provision_users(stream, pool=None, batch_size=1000):
+    """ Потоковое создание пользователей из CSV с отчётом по каждой строке """
+    groups = {}
+    batch = []
+    for line, row, error in read_users(stream):
+        if error is not None:
+            yield {"line": line, "status": "error", "errors": error}
+        else:
+            batch.append((line, row))
+
+        if len(batch) >= batch_size:
+            yield from save_batch(batch, pool, groups)
+            batch = []
+
+    if batch:
+        yield from save_batch(batch, pool, groups)
@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.contrib.auth.models import Group
+
+MODERATORS = "Moderators"
+TEACHERS = "Teachers"
+
+# Claim access-токена со списком ролей пользователя
+ROLES_CLAIM = "roles"
+
+
+def group_names(user_id):
+    return Group.objects.filter(user=user_id).values_list("name", flat=True)
+
+
+def load_roles(user_id):
+    """ Названия групп пользователя одним запросом
+
+    Между запросами роли не кешируются: иначе после изменения групп другие
+    процессы и параллельные запросы продолжают видеть старые роли.
+    """
+    return frozenset(group_names(user_id))
+
+
+async def aload_roles(user_id):
+    """ Асинхронный вариант load_roles """
+    return frozenset([name async for name in group_names(user_id)])
+
+
+def token_roles(request):
+    """ Роли из claims access-токена или None, если их там нет """
+    claims = getattr(request.auth, "payload", None) or {}
+    if settings.JWT_ROLE_CLAIMS and ROLES_CLAIM in claims:
+        return frozenset(claims[ROLES_CLAIM])
+    return None
+
+
+def get_roles(request):
+    """ Роли пользователя запроса, определяемые один раз за запрос
+
+    Если в access-токене есть claim с ролями, запросов к базе данных нет.
+    """
+    user = request.user
+    if not user or not user.is_authenticated:
+        return frozenset()
+
+    roles = getattr(request, "_roles", None)
+    if roles is None:
+        roles = token_roles(request)
+        if roles is None:
+            roles = load_roles(user.pk)
+        request._roles = roles
+    return roles
+
+
+async def aget_roles(request):
+    """ Асинхронный вариант get_roles """
+    user = request.user
+    if not user or not user.is_authenticated:
+        return frozenset()
+
+    roles = getattr(request, "_roles", None)
+    if roles is None:
+        roles = token_roles(request)
+        if roles is None:
+            roles = await aload_roles(user.pk)
+        request._roles = roles
+    return roles
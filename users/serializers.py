@@ -1,9 +1,33 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import (
+    TokenBlacklistSerializer,
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
 
 from users.models import User
+from users.thumbnails import thumbnail_urls
+from users.tokens import RoleRefreshToken
 
 
 class UserSerializer(serializers.ModelSerializer):
+    avatar_thumbnails = serializers.SerializerMethodField()
+
+    def get_avatar_thumbnails(self, user):
+        return thumbnail_urls(user)
+
     class Meta:
         model = User
         fields = "__all__"
+
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = RoleRefreshToken
+
+
+class RoleTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = RoleRefreshToken
+
+
+class RoleTokenBlacklistSerializer(TokenBlacklistSerializer):
+    token_class = RoleRefreshToken
@@ -0,0 +1,42 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from education.storage import file_replaced, is_new_file, release_file
+from users.authentication import user_row_cache
+from users.models import User
+from users.thumbnails import pregenerate_thumbnails
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    user_row_cache.invalidate(instance.pk)
+
+
+@receiver(pre_save, sender=User)
+def avatar_replacing(sender, instance, update_fields=None, **kwargs):
+    if instance._state.adding:
+        instance._previous_avatar = None
+    elif update_fields is None or "avatar" in update_fields:
+        previous = User.objects.filter(pk=instance.pk).values_list("avatar", flat=True)
+        instance._previous_avatar = previous.first()
+    instance._avatar_stored = is_new_file(instance.avatar, update_fields)
+
+
+@receiver(post_save, sender=User)
+def avatar_saved(sender, instance, **kwargs):
+    if hasattr(instance, "_previous_avatar"):
+        previous, current = instance._previous_avatar or None, instance.avatar.name
+        file_replaced(previous, current or None, stored=instance._avatar_stored)
+        if current and current != previous and settings.AVATAR_THUMBNAIL_PREGENERATE:
+            transaction.on_commit(partial(pregenerate_thumbnails, current))
+        del instance._previous_avatar
+
+
+@receiver(post_delete, sender=User)
+def avatar_deleted(sender, instance, **kwargs):
+    release_file(instance.avatar.name)
@@ -0,0 +1,387 @@
+import os
+import tempfile
+from io import BytesIO, StringIO
+
+from django.contrib.auth.models import Group
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from rest_framework_simplejwt.tokens import AccessToken
+
+from education.models import Lesson, Section, Test
+from users.authentication import user_row_cache
+from users.models import User
+from users.permissions import IsModer, IsTeacher
+from users.roles import load_roles
+from users.serializers import UserSerializer
+from users.thumbnails import rendition_path, rendition_pool
+from users.tokens import RoleRefreshToken as RefreshToken
+
+
+def group_queries(queries):
+    return [query for query in queries if "auth_group" in query["sql"]]
+
+
+class RolesTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(email="teacher@lms.ru")
+        self.user.set_password("password")
+        self.user.save()
+        self.teachers = Group.objects.create(name="Teachers")
+        self.user.groups.add(self.teachers)
+        self.owner = User.objects.create(email="owner@lms.ru")
+        self.section = Section.objects.create(title="Section", owner=self.owner)
+
+    def obtain_tokens(self):
+        response = self.client.post(
+            "/users/token/",
+            {"email": "teacher@lms.ru", "password": "password"},
+            format="json",
+        )
+        return response.json()
+
+    def test_roles_loaded_once(self):
+        """Тестирование загрузки ролей одним запросом на каждый запрос"""
+        self.client.force_authenticate(self.user)
+        lessons = [
+            Lesson.objects.create(
+                title=f"Lesson {number}", section=self.section, owner=self.owner
+            )
+            for number in range(2)
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(f"/lesson/delete/{lessons[0].id}/")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(len(group_queries(queries)), 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(f"/lesson/delete/{lessons[1].id}/")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(len(group_queries(queries)), 1)
+
+    def test_roles_follow_membership(self):
+        """Тестирование ролей сразу после изменения групп"""
+        self.assertEqual(load_roles(self.user.id), {"Teachers"})
+
+        self.user.groups.remove(self.teachers)
+        self.assertEqual(load_roles(self.user.id), set())
+
+        self.teachers.user_set.add(self.user)
+        self.assertEqual(load_roles(self.user.id), {"Teachers"})
+
+        self.teachers.name = "Moderators"
+        self.teachers.save()
+        self.assertEqual(load_roles(self.user.id), {"Moderators"})
+
+        self.teachers.user_set.clear()
+        self.assertEqual(load_roles(self.user.id), set())
+
+    async def test_async_role_permissions(self):
+        """Тестирование асинхронной проверки ролей для ASGI-представлений"""
+        request = Request(APIRequestFactory().get("/sections/"))
+        request.user, request.auth = self.user, None
+
+        self.assertTrue(await IsTeacher().ahas_permission(request, None))
+        self.assertFalse(await IsModer().ahas_permission(request, None))
+
+    @override_settings(JWT_ROLE_CLAIMS=True)
+    def test_roles_claim(self):
+        """Тестирование проверки ролей по claims access-токена"""
+        tokens = self.obtain_tokens()
+        self.assertEqual(AccessToken(tokens["access"])["roles"], ["Teachers"])
+
+        lesson = Lesson.objects.create(
+            title="Lesson", section=self.section, owner=self.owner
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(f"/lesson/delete/{lesson.id}/")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(group_queries(queries), [])
+
+        self.user.groups.clear()
+        self.client.credentials()
+        response = self.client.post(
+            "/users/token/refresh/", {"refresh": tokens["refresh"]}, format="json"
+        )
+        self.assertEqual(AccessToken(response.json()["access"])["roles"], [])
+
+
+class CachedJWTAuthenticationTest(APITestCase):
+    def setUp(self):
+        user_row_cache.clear()
+        self.user = User.objects.create(email="student@lms.ru")
+        self.token = AccessToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        self.test = Test.objects.create(title="Test", owner=self.user)
+
+    def tearDown(self):
+        user_row_cache.clear()
+
+    def test_authenticated_read_without_user_query(self):
+        """Тестирование чтения без запросов пользователя к базе данных"""
+        self.client.get(f"/test/{self.test.id}/")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/test/{self.test.id}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [query for query in queries if "users_user" in query["sql"]], []
+        )
+
+        response = self.client.post("/test/create/", {"title": "Owned"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Test.objects.get(title="Owned").owner, self.user)
+
+        response = self.client.delete(f"/test/delete/{self.test.id}/")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_deactivation_invalidates_cache(self):
+        """Тестирование отказа в доступе после деактивации пользователя"""
+        self.assertEqual(
+            self.client.get(f"/test/{self.test.id}/").status_code,
+            status.HTTP_200_OK,
+        )
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(
+            self.client.get(f"/test/{self.test.id}/").status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+
+        self.user.delete()
+        self.assertEqual(
+            self.client.get("/tests/").status_code, status.HTTP_401_UNAUTHORIZED
+        )
+
+
+class TokenBlacklistTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(email="student@lms.ru")
+        self.user.set_password("password")
+        self.user.save()
+
+    def obtain_refresh(self):
+        response = self.client.post(
+            "/users/token/",
+            {"email": "student@lms.ru", "password": "password"},
+            format="json",
+        )
+        return response.json()["refresh"]
+
+    def refresh(self, token):
+        return self.client.post(
+            "/users/token/refresh/", {"refresh": token}, format="json"
+        )
+
+    def test_rotated_token_revoked(self):
+        """Тестирование отзыва refresh-токена после ротации"""
+        refresh = self.obtain_refresh()
+
+        response = self.refresh(refresh)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rotated = response.json()["refresh"]
+
+        self.assertEqual(
+            self.refresh(refresh).status_code, status.HTTP_401_UNAUTHORIZED
+        )
+
+        response = self.client.post(
+            "/users/token/blacklist/", {"refresh": rotated}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.refresh(rotated).status_code, status.HTTP_401_UNAUTHORIZED
+        )
+
+    def test_other_process_revocation(self):
+        """Тестирование отказа сразу после отзыва токена другим процессом"""
+        other = RefreshToken.for_user(self.user)
+        BlacklistedToken.objects.create(
+            token=OutstandingToken.objects.get(jti=other["jti"])
+        )
+        self.assertEqual(
+            self.refresh(str(other)).status_code, status.HTTP_401_UNAUTHORIZED
+        )
+
+    def test_purge_tokens(self):
+        """Тестирование удаления истёкших токенов пачками"""
+        self.refresh(self.obtain_refresh())
+        OutstandingToken.objects.update(expires_at=timezone.now())
+        RefreshToken.for_user(self.user)
+
+        out = StringIO()
+        call_command("purge_tokens", "--batch-size", "1", stdout=out)
+
+        self.assertIn("Purged 2 expired tokens", out.getvalue())
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+
+class ProvisionUsersTest(APITestCase):
+    def test_register_single_insert(self):
+        """Тестирование регистрации одним запросом INSERT"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                "/users/register/",
+                {"email": "new@lms.ru", "password": "s3cret-pass"},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        writes = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith(("INSERT", "UPDATE"))
+        ]
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(writes[0].startswith('INSERT INTO "users_user"'))
+        self.assertTrue(User.objects.get().check_password("s3cret-pass"))
+
+    def test_provision_users(self):
+        """Тестирование массового создания пользователей из CSV"""
+        User.objects.create(email="exists@lms.ru")
+        content = (
+            "email,password,first_name,groups\n"
+            "one@lms.ru,pass-one,Анна,Teachers;Moderators\n"
+            "two@lms.ru,pass-two,,Teachers\n"
+            "broken,pass,,\n"
+            "Exists@lms.ru,pass,,\n"
+            "three@lms.ru,,,\n"
+        )
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+            f.write(content)
+
+        out, err = StringIO(), StringIO()
+        call_command(
+            "provision_users",
+            f.name,
+            "--workers",
+            "2",
+            "--batch-size",
+            "2",
+            stdout=out,
+            stderr=err,
+        )
+
+        self.assertIn("Created 3 users, skipped 1, failed 1", out.getvalue())
+        self.assertIn("Line 4:", err.getvalue())
+        one = User.objects.get(email="one@lms.ru")
+        self.assertEqual(one.first_name, "Анна")
+        self.assertTrue(one.check_password("pass-one"))
+        self.assertEqual(load_roles(one.id), {"Teachers", "Moderators"})
+        self.assertEqual(
+            list(User.objects.get(email="two@lms.ru").groups.values_list("name")),
+            [("Teachers",)],
+        )
+        self.assertFalse(User.objects.get(email="three@lms.ru").has_usable_password())
+
+
+def png_image(width, height, color):
+    content = BytesIO()
+    Image.new("RGBA", (width, height), color).save(content, "PNG")
+    return content.getvalue()
+
+
+class AvatarThumbnailTest(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.override = override_settings(
+            MEDIA_ROOT=self.media_root.name, THUMBNAIL_WORKERS=0
+        )
+        self.override.enable()
+        self.user = User.objects.create(email="admin@lms.ru")
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.avatar = SimpleUploadedFile(
+                "me.png", png_image(400, 200, (200, 0, 0, 128))
+            )
+            self.user.save()
+        self.urls = UserSerializer(self.user).data["avatar_thumbnails"]
+
+    def tearDown(self):
+        self.override.disable()
+        self.media_root.cleanup()
+
+    def test_thumbnails_generated_on_upload(self):
+        """Тестирование подготовки миниатюр при загрузке аватара"""
+        digest = self.user.avatar.name.rsplit("/", 1)[1].split(".")[0]
+        for size in (40, 80, 160, 320):
+            for image_format in ("webp", "jpeg"):
+                path = rendition_path(digest, size, image_format)
+                self.assertTrue(os.path.exists(path))
+        self.assertEqual(
+            self.urls["40"]["webp"],
+            f"/users/{self.user.id}/avatar/{digest}/40.webp",
+        )
+
+    def test_get_thumbnail(self):
+        """Тестирование выдачи миниатюры с долгим кешированием"""
+        response = self.client.get(self.urls["80"]["webp"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "image/webp")
+        self.assertIn("immutable", response["Cache-Control"])
+        image = Image.open(BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual((image.format, image.size), ("WEBP", (80, 80)))
+
+        response = self.client.get(
+            self.urls["80"]["webp"], HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(self.urls["40"]["jpeg"])
+        image = Image.open(BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual((image.format, image.mode), ("JPEG", "RGB"))
+
+        for url in (
+            self.urls["40"]["webp"].replace("/40.", "/41."),
+            self.urls["40"]["webp"].replace("/avatar/", "/avatar/0"),
+            self.urls["40"]["webp"].replace(".webp", ".gif"),
+        ):
+            self.assertEqual(
+                self.client.get(url).status_code, status.HTTP_404_NOT_FOUND
+            )
+
+    def test_thumbnail_rendered_in_pool(self):
+        """Тестирование отрисовки миниатюры в пуле процессов"""
+        digest = self.user.avatar.name.rsplit("/", 1)[1].split(".")[0]
+        path = rendition_path(digest, 160, "jpeg")
+        os.remove(path)
+        try:
+            with override_settings(THUMBNAIL_WORKERS=1):
+                first = rendition_pool.submit(self.user.avatar.path, path, 160, "jpeg")
+                second = rendition_pool.submit(self.user.avatar.path, path, 160, "jpeg")
+                self.assertIs(first, second)
+                self.assertEqual(first.result(timeout=60), path)
+        finally:
+            rendition_pool.shutdown()
+        self.assertEqual(Image.open(path).size, (160, 160))
+
+    def test_prune_thumbnails(self):
+        """Тестирование удаления миниатюр заменённого аватара"""
+        old = rendition_path(self.urls["40"]["webp"].split("/")[-2], 40, "webp")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.avatar = SimpleUploadedFile(
+                "new.png", png_image(100, 100, (0, 0, 200, 255))
+            )
+            self.user.save()
+
+        out = StringIO()
+        call_command("prune_thumbnails", stdout=out)
+        self.assertIn("Removed 8 thumbnails", out.getvalue())
+        self.assertFalse(os.path.exists(old))
+        new = UserSerializer(self.user).data["avatar_thumbnails"]["40"]["webp"]
+        self.assertEqual(self.client.get(new).status_code, status.HTTP_200_OK)
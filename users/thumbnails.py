@@ -0,0 +1,191 @@
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.urls import reverse
+from PIL import Image, ImageOps
+
+from education.storage import content_storage, file_digest, name_digest
+
+# Формат миниатюры в URL -> расширение файла и MIME-тип
+FORMATS = {
+    "webp": ("webp", "image/webp"),
+    "jpeg": ("jpg", "image/jpeg"),
+}
+
+RENDITION_RE = re.compile(r"^([0-9a-f]{64})-\d+\.\w+$")
+
+# Сколько запрос ждёт миниатюру из пула процессов, секунд
+RENDER_TIMEOUT = 30
+
+
+def flatten(image, image_format):
+    """ Приведение режима изображения к поддерживаемому форматом миниатюры """
+    has_alpha = "A" in image.getbands() or "transparency" in image.info
+    if not has_alpha:
+        return image.convert("RGB")
+    image = image.convert("RGBA")
+    if image_format == "webp":
+        return image
+    background = Image.new("RGB", image.size, "white")
+    background.paste(image, mask=image.getchannel("A"))
+    return background
+
+
+def render_thumbnail(source, target, size, image_format, quality):
+    """ Квадратная миниатюра с обрезкой по центру (выполняется в пуле процессов)
+
+    JPEG декодируется сразу в уменьшенном масштабе (Image.draft), файл
+    пишется во временный и переименовывается, поэтому параллельные
+    процессы не видят недописанных миниатюр.
+    """
+    with Image.open(source) as original:
+        original.draft("RGB", (size, size))
+        image = ImageOps.exif_transpose(original)
+        image = flatten(image, image_format)
+        image = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+
+    directory = os.path.dirname(target)
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=directory, delete=False) as file:
+        if image_format == "jpeg":
+            image.save(file, "JPEG", quality=quality, optimize=True, progressive=True)
+        else:
+            image.save(file, "WEBP", quality=quality, method=4)
+    os.replace(file.name, target)
+    return target
+
+
+class RenditionPool:
+    """ Пул процессов для миниатюр с объединением одинаковых заданий
+
+    Пока миниатюра рисуется, повторные запросы её же ждут то же задание.
+    При THUMBNAIL_WORKERS = 0 миниатюры рисуются в текущем процессе.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._executor = None
+        self._pending = {}
+
+    def executor(self):
+        if self._executor is None:
+            # Веб-процесс многопоточный, поэтому процессы не форкаются
+            self._executor = ProcessPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def submit(self, source, target, size, image_format):
+        task = (source, target, size, image_format, settings.AVATAR_THUMBNAIL_QUALITY)
+        if settings.THUMBNAIL_WORKERS <= 0:
+            future = Future()
+            try:
+                future.set_result(render_thumbnail(*task))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        with self._lock:
+            future = self._pending.get(target)
+            if future is None:
+                future = self.executor().submit(render_thumbnail, *task)
+                self._pending[target] = future
+                future.add_done_callback(partial(self.finished, target))
+        return future
+
+    def finished(self, target, future):
+        with self._lock:
+            if self._pending.get(target) is future:
+                del self._pending[target]
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+rendition_pool = RenditionPool()
+
+
+def thumbnail_dir():
+    return settings.AVATAR_THUMBNAIL_DIR or os.path.join(
+        settings.MEDIA_ROOT, "thumbnails"
+    )
+
+
+def rendition_path(digest, size, image_format):
+    """ Путь миниатюры в кеше на диске по хешу исходника, размеру и формату """
+    extension = FORMATS[image_format][0]
+    return os.path.join(thumbnail_dir(), digest[:2], f"{digest}-{size}.{extension}")
+
+
+def source_digest(name):
+    """ SHA-256 аватара из имени файла или по его содержимому """
+    return name_digest(name) or file_digest(content_storage.path(name))
+
+
+def get_rendition(name, digest, size, image_format):
+    """ Путь готовой миниатюры: из кеша на диске или нарисованной в пуле """
+    target = rendition_path(digest, size, image_format)
+    if not os.path.exists(target):
+        source = content_storage.path(name)
+        future = rendition_pool.submit(source, target, size, image_format)
+        future.result(timeout=RENDER_TIMEOUT)
+    return target
+
+
+def pregenerate_thumbnails(name):
+    """ Фоновая подготовка всех миниатюр только что загруженного аватара """
+    try:
+        digest = source_digest(name)
+    except OSError:
+        return
+    source = content_storage.path(name)
+    for size in settings.AVATAR_THUMBNAIL_SIZES:
+        for image_format in FORMATS:
+            target = rendition_path(digest, size, image_format)
+            if not os.path.exists(target):
+                rendition_pool.submit(source, target, size, image_format)
+
+
+def thumbnail_urls(user):
+    """ URL миниатюр аватара по размерам и форматам или None без аватара """
+    if not user.avatar:
+        return None
+    try:
+        digest = source_digest(user.avatar.name)
+    except OSError:
+        return None
+    return {
+        str(size): {
+            image_format: reverse(
+                "users:avatar_thumbnail",
+                args=[user.pk, digest, size, image_format],
+            )
+            for image_format in FORMATS
+        }
+        for size in settings.AVATAR_THUMBNAIL_SIZES
+    }
+
+
+def prune_renditions(digests):
+    """ Удаление миниатюр, хеш исходника которых не входит в digests """
+    removed = 0
+    root = thumbnail_dir()
+    if not os.path.isdir(root):
+        return removed
+    for directory, _, files in os.walk(root):
+        for filename in files:
+            match = RENDITION_RE.match(filename)
+            if match and match.group(1) not in digests:
+                os.remove(os.path.join(directory, filename))
+                removed += 1
+    return removed
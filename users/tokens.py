@@ -0,0 +1,21 @@
+from django.conf import settings
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.roles import ROLES_CLAIM, load_roles
+
+
+class RoleRefreshToken(RefreshToken):
+    """ Refresh-токен, добавляющий роли пользователя в выдаваемый access-токен
+
+    Роли не копируются в сам refresh-токен и пересчитываются при каждом
+    обновлении, поэтому изменения групп видны не позже следующего refresh.
+    """
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        if settings.JWT_ROLE_CLAIMS:
+            user_id = self[api_settings.USER_ID_CLAIM]
+            access[ROLES_CLAIM] = sorted(load_roles(user_id))
+        return access
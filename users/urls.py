@@ -1,16 +1,22 @@
 from django.urls import path
 from rest_framework.permissions import AllowAny
 from rest_framework_simplejwt.views import (
+    TokenBlacklistView,
     TokenObtainPairView,
     TokenRefreshView,
 )
-from users.views import UserCreateApiView
+from users.views import AvatarThumbnailView, UserCreateApiView
 from users.apps import UsersConfig
 
 app_name = UsersConfig.name
 
 urlpatterns = [
     path("register/", UserCreateApiView.as_view(), name="register"),
+    path(
+        "<int:pk>/avatar/<str:digest>/<int:size>.<str:image_format>",
+        AvatarThumbnailView.as_view(),
+        name="avatar_thumbnail",
+    ),
     path(
         "token/",
         TokenObtainPairView.as_view(permission_classes=[AllowAny]),
@@ -21,4 +27,9 @@ urlpatterns = [
         TokenRefreshView.as_view(permission_classes=[AllowAny]),
         name="token_refresh",
     ),
+    path(
+        "token/blacklist/",
+        TokenBlacklistView.as_view(permission_classes=[AllowAny]),
+        name="token_blacklist",
+    ),
 ]
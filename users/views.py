@@ -1,8 +1,18 @@
+import os
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.http import FileResponse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework.exceptions import NotFound
 from rest_framework.generics import CreateAPIView
 from rest_framework.permissions import AllowAny
+from rest_framework.views import APIView
 
 from users.models import User
 from users.serializers import UserSerializer
+from users.thumbnails import FORMATS, get_rendition, source_digest
 
 
 class UserCreateApiView(CreateAPIView):
@@ -12,6 +22,40 @@ class UserCreateApiView(CreateAPIView):
     permission_classes = [AllowAny]
 
     def perform_create(self, serializer):
-        user = serializer.save(is_active=True)
-        user.set_password(user.password)
-        user.save()
+        password = make_password(serializer.validated_data["password"])
+        serializer.save(is_active=True, password=password)
+
+
+class AvatarThumbnailView(APIView):
+    """ Миниатюра аватара пользователя
+
+    Хеш исходника входит в URL, поэтому ответ кешируется надолго: новый
+    аватар получит другой URL.
+    """
+
+    def get(self, request, pk, digest, size, image_format):
+        if size not in settings.AVATAR_THUMBNAIL_SIZES or image_format not in FORMATS:
+            raise NotFound
+        name = User.objects.filter(pk=pk).values_list("avatar", flat=True).first()
+        try:
+            if not name or source_digest(name) != digest:
+                raise NotFound
+            path = get_rendition(name, digest, size, image_format)
+            last_modified = int(os.path.getmtime(path))
+        except OSError:
+            raise NotFound
+
+        etag = quote_etag(f"{digest}-{size}-{image_format}")
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = FileResponse(
+                open(path, "rb"), content_type=FORMATS[image_format][1]
+            )
+        response.headers["ETag"] = etag
+        response.headers["Last-Modified"] = http_date(last_modified)
+        response.headers["Cache-Control"] = (
+            f"private, max-age={settings.AVATAR_THUMBNAIL_MAX_AGE}, immutable"
+        )
+        return response